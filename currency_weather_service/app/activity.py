@@ -0,0 +1,72 @@
+import sys
+import threading
+
+# уровни активности потребителей данных: чем меньше, тем нужнее свежие данные
+ACTIVE = 0
+# данные на виду, но пользователь отошёл — опрос реже
+IDLE = 1
+# данные никто не видит (окно свёрнуто или скрыто) — опрос только по просьбе
+HIDDEN = 2
+
+# пользователь считается отошедшим, если столько секунд не трогал мышь и клавиатуру
+IDLE_AFTER = 600
+
+
+def idle_seconds():
+    """
+    Сколько секунд пользователь не трогал мышь и клавиатуру во всей системе;
+    None — узнать нельзя (пока только Windows).
+    """
+    if sys.platform != "win32":
+        return None
+    import ctypes
+
+    class LastInputInfo(ctypes.Structure):
+        _fields_ = [("cbSize", ctypes.c_uint), ("dwTime", ctypes.c_uint)]
+
+    info = LastInputInfo()
+    info.cbSize = ctypes.sizeof(info)
+    if not ctypes.windll.user32.GetLastInputInfo(ctypes.byref(info)):
+        return None
+    # GetTickCount переполняется раз в 49 дней
+    return ((ctypes.windll.kernel32.GetTickCount() - info.dwTime) & 0xFFFFFFFF) / 1000
+
+
+class Activity:
+    """
+    Кому сейчас нужны данные: окно, трей, демон сообщают свой уровень,
+    а опрос идёт по самому активному из них. Пока никто ничего не сообщил,
+    уровень ACTIVE — как у хаба без потребителей (замеры, тесты).
+    """
+    def __init__(self, idle_after=IDLE_AFTER, idle_probe=idle_seconds):
+        self.idle_after = idle_after
+        self.idle_probe = idle_probe
+        self._levels = {}
+        self._lock = threading.Lock()
+
+    def set(self, consumer, level):
+        """Возвращает True, если данные стали нужнее, чем были."""
+        with self._lock:
+            before = self._declared()
+            self._levels[consumer] = level
+            return self._declared() < before
+
+    def remove(self, consumer):
+        with self._lock:
+            self._levels.pop(consumer, None)
+
+    def _declared(self):
+        return min(self._levels.values(), default=ACTIVE)
+
+    def level(self, *extra):
+        """
+        Итоговый уровень; extra — уровни потребителей в других процессах.
+        Видимые данные при отошедшем пользователе — IDLE.
+        """
+        with self._lock:
+            level = min([*self._levels.values(), *extra], default=ACTIVE)
+        if level == ACTIVE:
+            idle = self.idle_probe()
+            if idle is not None and idle >= self.idle_after:
+                return IDLE
+        return level
@@ -0,0 +1,140 @@
+# настройки по умолчанию: ключ "alerts" в settings.json
+DEFAULT_ALERTS = {
+    # порог изменения курса от опорного: в процентах и/или в BYN за единицу
+    "pct": 0.5,
+    "abs": None,
+    # повторное уведомление — только после того, как изменение от опорного
+    # курса опустится до порога * (1 - hysteresis) или пройдёт cooldown
+    "hysteresis": 0.5,
+    # не чаще одного уведомления по валюте за cooldown секунд
+    "cooldown": 3600,
+    # переопределения для отдельных валют: {"RUB": {"pct": 1.0}}
+    "rules": {}
+}
+
+
+class AlertRule:
+    """
+    Правило для одной валюты. Срабатывает, если изменение достигло
+    любого из заданных порогов (pct или abs).
+    """
+    __slots__ = ("pct", "abs", "hysteresis", "cooldown")
+
+    def __init__(self, pct=None, abs=None, hysteresis=0.5, cooldown=3600):
+        self.pct = pct
+        self.abs = abs
+        self.hysteresis = hysteresis
+        self.cooldown = cooldown
+
+    def level(self, old, new):
+        """
+        Изменение в долях порога: 1.0 и больше — порог достигнут.
+        """
+        levels = [0.0]
+        if self.abs:
+            levels.append(abs(new - old) / self.abs)
+        if self.pct and old:
+            levels.append(abs(new - old) / old * 100 / self.pct)
+        return max(levels)
+
+
+class AlertState:
+    """
+    Состояние правила по валюте. reference — опорный курс, от которого
+    меряются и порог, и полоса гистерезиса; он ставится при первом
+    курсе и при каждом взведении правила.
+    """
+    __slots__ = ("reference", "armed", "last_fired")
+
+    def __init__(self, reference):
+        self.reference = reference
+        self.armed = True
+        self.last_fired = None
+
+
+class Alert:
+    __slots__ = ("code", "old", "new")
+
+    def __init__(self, code, old, new):
+        self.code = code
+        self.old = old
+        self.new = new
+
+    @property
+    def change_pct(self):
+        return (self.new - self.old) / self.old * 100 if self.old else 0.0
+
+    def format(self):
+        arrow = "▲" if self.new > self.old else "▼"
+        return f"{self.code}: {self.new} {arrow}{abs(self.change_pct):.2f}%"
+
+
+class AlertEngine:
+    """
+    Правила уведомлений об изменении курсов: один проход по всем
+    отслеживаемым валютам за цикл обновления.
+    """
+    def __init__(self, default=None, rules=None):
+        self.default = default or AlertRule()
+        self.rules = rules or {}
+        self.states = {}
+
+    @classmethod
+    def from_settings(cls, settings):
+        config = dict(DEFAULT_ALERTS, **(settings.get("alerts") or {}))
+        common = {k: config[k] for k in ("pct", "abs", "hysteresis", "cooldown")}
+        default = AlertRule(**common)
+        rules = {
+            code.upper(): AlertRule(**dict(common, **override))
+            for code, override in (config["rules"] or {}).items()
+        }
+        return cls(default, rules)
+
+    def rule(self, code):
+        return self.rules.get(code, self.default)
+
+    def evaluate(self, rates, now):
+        """
+        Сравнивает курсы с опорными, возвращает [Alert] по валютам,
+        которые прошли порог, гистерезис и кулдаун.
+
+        Опорный курс не сдвигается за каждым циклом: медленный дрейф
+        накапливается до порога. После уведомления правило ждёт, пока
+        изменение от опорного курса уйдёт в полосу гистерезиса или пройдёт
+        cooldown, и взводится заново от текущего курса.
+        """
+        alerts = []
+        for code, new in rates.items():
+            if new is None:
+                continue
+            state = self.states.get(code)
+            if state is None:
+                self.states[code] = AlertState(new)
+                continue
+            rule = self.rule(code)
+            level = rule.level(state.reference, new)
+
+            if not state.armed:
+                # движение затихло или давно было уведомление — взводим от текущего курса
+                if level <= 1 - rule.hysteresis or now - state.last_fired >= rule.cooldown:
+                    state.armed = True
+                    state.reference = new
+                continue
+            if level < 1:
+                continue
+            if state.last_fired is not None and now - state.last_fired < rule.cooldown:
+                continue
+
+            state.armed = False
+            state.last_fired = now
+            alerts.append(Alert(code, state.reference, new))
+        return alerts
+
+
+def digest(alerts):
+    """
+    Все сработавшие правила цикла — одним уведомлением: (заголовок, текст).
+    """
+    if len(alerts) == 1:
+        return f"Изменение курса {alerts[0].code}", alerts[0].format()
+    return "Изменение курсов", "\n".join(alert.format() for alert in alerts)
@@ -1,16 +1,121 @@
-import requests
-
-# ID валют НБ РБ
-CURRENCY_IDS = {
-    "USD": 431,
-    "EUR": 451,
-    "RUB": 456
-}
-
-def get_rates():
-    result = {}
-    for code, cid in CURRENCY_IDS.items():
-        url = f"https://api.nbrb.by/exrates/rates/{cid}"
-        data = requests.get(url, timeout=5).json()
-        result[code] = data["Cur_OfficialRate"]
-    return result
+import datetime
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from app import http_client
+from app.providers import ProviderGroup
+
+log = logging.getLogger(__name__)
+
+# базовый адрес можно переопределить, например, для локального стенда
+NBRB_URL = os.environ.get("CWS_NBRB_URL", "https://api.nbrb.by")
+# запасной адрес для страхующих запросов, например локальная заглушка
+NBRB = ProviderGroup("nbrb", [NBRB_URL, os.environ.get("CWS_NBRB_ALT_URL")])
+
+# ID валют НБ РБ
+CURRENCY_IDS = {
+    "USD": 431,
+    "EUR": 451,
+    "RUB": 456
+}
+# основные валюты в окне и трее
+RATE_CODES = tuple(CURRENCY_IDS)
+
+
+def normalize_rate(row):
+    """
+    Курс за одну единицу валюты: НБ РБ котирует часть валют
+    за Cur_Scale единиц (RUB — за 100).
+    """
+    return round(row["Cur_OfficialRate"] / row.get("Cur_Scale", 1), 6)
+
+
+def get_rates_table(ondate=None):
+    """
+    Вся дневная таблица курсов НБ РБ одним запросом (ondate — на дату, по умолчанию сегодня).
+    Возвращает {Cur_Abbreviation: запись API}.
+    """
+    params = {"periodicity": 0}
+    if ondate is not None:
+        params["ondate"] = ondate.isoformat()
+    data = NBRB.call(lambda base: http_client.get_json(f"{base}/exrates/rates", params=params))
+    return {row["Cur_Abbreviation"]: row for row in data}
+
+
+def get_rates_dynamics(cid, start, end):
+    """
+    Курсы валюты с ID cid за период [start, end] (не длиннее года).
+    Возвращает [(date, курс за Cur_Scale единиц)].
+    """
+    params = {"startdate": start.isoformat(), "enddate": end.isoformat()}
+    data = NBRB.call(
+        lambda base: http_client.get_json(f"{base}/exrates/rates/dynamics/{cid}", params=params)
+    )
+    return [
+        (datetime.date.fromisoformat(row["Date"][:10]), row["Cur_OfficialRate"])
+        for row in data
+    ]
+
+
+def _get_rate_by_id(cid):
+    return NBRB.call(lambda base: http_client.get_json(f"{base}/exrates/rates/{cid}"))
+
+
+def get_rates_by_id(codes):
+    """
+    Запасной путь: по запросу на каждую валюту, все запросы параллельно.
+    """
+    ids = [CURRENCY_IDS[code] for code in codes if code in CURRENCY_IDS]
+    if not ids:
+        return {}
+    with ThreadPoolExecutor(max_workers=len(ids)) as pool:
+        rows = list(pool.map(_get_rate_by_id, ids))
+    return {row["Cur_Abbreviation"]: row for row in rows}
+
+
+def _load_table(codes):
+    try:
+        return get_rates_table()
+    except Exception as e:
+        log.error("Ошибка загрузки таблицы курсов: %s", e)
+        return get_rates_by_id(codes)
+
+
+def fetch_rates_table():
+    """
+    Вся таблица курсов за единицу валюты {код: курс} и её дата (YYYY-MM-DD).
+    Если таблица недоступна — только отслеживаемые валюты.
+    """
+    table = _load_table(CURRENCY_IDS)
+    rates = {code: normalize_rate(row) for code, row in table.items()}
+    dates = [row["Date"][:10] for row in table.values()]
+    return rates, min(dates) if dates else None
+
+
+def fetch_previous_table(rates_date):
+    """
+    Таблица за день до rates_date: {код: курс за единицу} — для дневных изменений.
+    """
+    day = datetime.date.fromisoformat(rates_date) - datetime.timedelta(days=1)
+    return {code: normalize_rate(row) for code, row in get_rates_table(day).items()}
+
+
+def fetch_rates(codes=None):
+    """
+    Курсы за единицу валюты и дата (YYYY-MM-DD), на которую они установлены.
+    """
+    codes = list(codes or CURRENCY_IDS)
+    table = _load_table(codes)
+
+    rates = {
+        code: normalize_rate(table[code])
+        for code in codes
+        if code in table
+    }
+    dates = [table[code]["Date"][:10] for code in codes if code in table]
+    return rates, min(dates) if dates else None
+
+
+def get_rates(codes=None):
+    return fetch_rates(codes)[0]
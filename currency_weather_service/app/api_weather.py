@@ -1,55 +1,157 @@
-import requests
-
-
-def get_city_coordinates(city: str):
-    """
-    Получает координаты города через Open-Meteo Geocoding API.
-    """
-    url = "https://geocoding-api.open-meteo.com/v1/search"
-    params = {
-        "name": city,
-        "count": 1,
-        "language": "ru",
-        "format": "json"
-    }
-
-    try:
-        resp = requests.get(url, params=params, timeout=5)
-        data = resp.json()
-
-        if "results" not in data or not data["results"]:
-            print("Город не найден:", city)
-            return None
-
-        lat = data["results"][0]["latitude"]
-        lon = data["results"][0]["longitude"]
-
-        print(f"Координаты {city}: {lat}, {lon}")
-        return lat, lon
-
-    except Exception as e:
-        print("Ошибка координат:", e)
-        return None
-
-
-def get_weather(city: str):
-    coords = get_city_coordinates(city)
-
-    if coords is None:
-        print("Использую Минск по умолчанию")
-        lat, lon = 53.9, 27.5667
-    else:
-        lat, lon = coords
-
-    url = (
-        "https://api.open-meteo.com/v1/forecast"
-        f"?latitude={lat}&longitude={lon}&current_weather=true"
-    )
-
-    data = requests.get(url, timeout=5).json()
-
-    return {
-        "temp": data["current_weather"]["temperature"],
-        "wind": data["current_weather"]["windspeed"],
-        "code": data["current_weather"]["weathercode"]
-    }
+import logging
+import os
+import threading
+
+from app import http_client, metrics
+from app.forecast import DAILY_FIELDS, FORECAST_DAYS, HOURLY_FIELDS, Forecast
+from app.gazetteer import get_gazetteer
+from app.geo_cache import MISS, get_geo_cache
+from app.providers import ProviderGroup
+
+log = logging.getLogger(__name__)
+
+# базовые адреса можно переопределить, например, для локального стенда
+GEOCODING_URL = os.environ.get("CWS_GEOCODING_URL", "https://geocoding-api.open-meteo.com")
+FORECAST_URL = os.environ.get("CWS_FORECAST_URL", "https://api.open-meteo.com")
+# запасные адреса для страхующих запросов, например локальная заглушка
+GEOCODING = ProviderGroup("geocoding", [GEOCODING_URL, os.environ.get("CWS_GEOCODING_ALT_URL")])
+FORECAST = ProviderGroup("forecast", [FORECAST_URL, os.environ.get("CWS_FORECAST_ALT_URL")])
+
+# если город не найден, get_weather показывает Минск
+DEFAULT_COORDS = (53.9, 27.5667)
+
+
+def get_city_coordinates(city: str, language: str = "ru"):
+    """
+    Координаты города: сначала встроенный справочник, затем Open-Meteo Geocoding API.
+    Ответ API (в том числе "не найден") хранится в дисковом кэше.
+    None — город не найден; ошибки сети и HTTP пробрасываются, чтобы сбой
+    не выглядел как опечатка в названии.
+    """
+    gazetteer = get_gazetteer()
+    if gazetteer is not None:
+        coords = gazetteer.lookup(city)
+        metrics.cache_requests.inc(cache="gazetteer", result="miss" if coords is None else "hit")
+        if coords is not None:
+            return coords
+
+    cache = get_geo_cache()
+    cached = cache.get(city, language)
+    if cached is not MISS:
+        return cached
+
+    params = {
+        "name": city,
+        "count": 1,
+        "language": language,
+        "format": "json"
+    }
+
+    data = GEOCODING.call(
+        lambda base: http_client.get_json(f"{base}/v1/search", params=params)
+    )
+
+    if "results" not in data or not data["results"]:
+        log.warning("Город не найден: %s", city)
+        cache.put(city, None, language)
+        return None
+
+    lat = data["results"][0]["latitude"]
+    lon = data["results"][0]["longitude"]
+
+    log.info("Координаты %s: %s, %s", city, lat, lon)
+    cache.put(city, (lat, lon), language)
+    return lat, lon
+
+
+def warm_city_coordinates(cities):
+    """
+    Прогревает кэш геокодинга в фоне, чтобы первое обновление погоды
+    обошлось одним HTTP-запросом.
+    """
+    def run():
+        try:
+            for city in cities:
+                get_city_coordinates(city)
+        except Exception as e:
+            # не страшно: координаты запросятся при первом обновлении погоды
+            log.warning("Не удалось прогреть кэш координат: %s", e)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+
+
+# сколько точек отправлять в одном запросе прогноза
+LOCATIONS_PER_REQUEST = 50
+
+
+def _parse_current(item):
+    return {
+        "temp": item["current_weather"]["temperature"],
+        "wind": item["current_weather"]["windspeed"],
+        "code": item["current_weather"]["weathercode"]
+    }
+
+
+def get_weather_at(locations):
+    """
+    Текущая погода и прогноз для списка координат [(lat, lon)] одним запросом:
+    Open-Meteo принимает списки широт и долгот через запятую.
+    Возвращает [(погода, Forecast)].
+    """
+    params = {
+        "latitude": ",".join(str(lat) for lat, _ in locations),
+        "longitude": ",".join(str(lon) for _, lon in locations),
+        "current_weather": "true",
+        "hourly": ",".join(HOURLY_FIELDS),
+        "daily": ",".join(DAILY_FIELDS),
+        "forecast_days": FORECAST_DAYS,
+        "timezone": "auto"
+    }
+
+    data = FORECAST.call(
+        lambda base: http_client.get_json(f"{base}/v1/forecast", params=params)
+    )
+    # для одной точки API отвечает объектом, для нескольких — списком
+    if isinstance(data, dict):
+        data = [data]
+    return [(_parse_current(item), Forecast.from_api(item)) for item in data]
+
+
+def fetch_weather(cities):
+    """
+    Погода и прогноз для нескольких городов: координаты берутся из кэша,
+    данные — одним запросом на каждые LOCATIONS_PER_REQUEST городов.
+    Возвращает ({город: погода}, {город: Forecast}), для ненайденных городов — None.
+    Ошибка геокодинга — ошибка всей загрузки погоды, а не "город не найден".
+    """
+    weather = {city: None for city in cities}
+    forecasts = dict(weather)
+    located = []
+    for city in weather:
+        coords = get_city_coordinates(city)
+        if coords is not None:
+            located.append((city, coords))
+
+    for i in range(0, len(located), LOCATIONS_PER_REQUEST):
+        chunk = located[i:i + LOCATIONS_PER_REQUEST]
+        items = get_weather_at([coords for _, coords in chunk])
+        for (city, _), (current, forecast) in zip(chunk, items):
+            weather[city] = current
+            forecasts[city] = forecast
+
+    return weather, forecasts
+
+
+def get_weather_many(cities):
+    return fetch_weather(cities)[0]
+
+
+def get_weather(city: str):
+    coords = get_city_coordinates(city)
+
+    if coords is None:
+        log.warning("Использую Минск по умолчанию")
+        coords = DEFAULT_COORDS
+
+    return get_weather_at([coords])[0][0]
@@ -0,0 +1,69 @@
+import numpy as np
+
+BASE = "BYN"
+
+
+def parse_pairs(pairs):
+    """
+    Пары из настроек: "EUR/USD" → ("EUR", "USD"). Кривые записи пропускаются.
+    """
+    result = []
+    for pair in pairs or []:
+        base, sep, quote = str(pair).upper().partition("/")
+        if sep and base.strip() and quote.strip():
+            result.append((base.strip(), quote.strip()))
+    return result
+
+
+class CrossRates:
+    """
+    Матрица кросс-курсов по таблице НБ РБ (BYN за единицу валюты).
+    matrix[i, j] — сколько единиц валюты j дают за одну единицу валюты i.
+    """
+    def __init__(self, table, previous=None):
+        self.codes = sorted(table) + [BASE]
+        self.index = {code: i for i, code in enumerate(self.codes)}
+
+        values = np.array([table[code] for code in self.codes[:-1]] + [1.0])
+        # одно внешнее деление вместо N² отдельных
+        self.matrix = values[:, None] / values[None, :]
+
+        self.delta = None
+        self.delta_pct = None
+        if previous:
+            prev = np.array(
+                [previous.get(code, np.nan) for code in self.codes[:-1]] + [1.0],
+                dtype=float
+            )
+            prev_matrix = prev[:, None] / prev[None, :]
+            self.delta = self.matrix - prev_matrix
+            self.delta_pct = self.delta / prev_matrix * 100
+
+    def __contains__(self, code):
+        return code in self.index
+
+    def _ij(self, base, quote):
+        return self.index[base.upper()], self.index[quote.upper()]
+
+    def rate(self, base, quote):
+        """Курс base/quote: сколько quote за одну единицу base."""
+        return float(self.matrix[self._ij(base, quote)])
+
+    def convert(self, amount, base, quote):
+        return amount * self.rate(base, quote)
+
+    def change(self, base, quote):
+        """
+        Изменение курса base/quote к прошлому дню: (абсолютное, в процентах)
+        или None, если прошлой таблицы нет.
+        """
+        if self.delta is None:
+            return None
+        i, j = self._ij(base, quote)
+        if np.isnan(self.delta[i, j]):
+            return None
+        return float(self.delta[i, j]), float(self.delta_pct[i, j])
+
+    def row(self, base):
+        """Курсы base ко всем валютам таблицы: {код: курс}."""
+        return dict(zip(self.codes, self.matrix[self.index[base.upper()]].tolist()))
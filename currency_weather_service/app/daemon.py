@@ -0,0 +1,178 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+
+from app.activity import ACTIVE
+from app.api_weather import warm_city_coordinates
+from app.hub import get_hub
+from app.settings import load_settings
+
+log = logging.getLogger(__name__)
+
+DAEMON_HOST = "127.0.0.1"
+DAEMON_PORT = 8765
+
+STATUS_TEXT = {
+    200: "OK",
+    304: "Not Modified",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    503: "Service Unavailable"
+}
+
+
+def _view(snapshot, keys):
+    return {k: snapshot.get(k) for k in keys}
+
+
+def _to_json(value):
+    # прогноз хранится в массивах, наружу — обычными списками
+    return value.to_dict()
+
+
+# что отдаётся по каждому пути
+VIEWS = {
+    "/snapshot": None,
+    "/rates": ("rates", "table", "rates_date", "rates_updated", "stale", "error"),
+    "/weather": ("cities", "weather", "weather_updated", "stale", "error"),
+    "/forecast": ("cities", "forecast", "weather_updated", "stale", "error"),
+}
+
+
+class Resource:
+    """
+    Готовый ответ: тело и ETag считаются один раз на обновление снимка,
+    а не на каждый запрос.
+    """
+    __slots__ = ("body", "etag")
+
+    def __init__(self, data):
+        self.body = json.dumps(data, ensure_ascii=False, default=_to_json).encode("utf-8")
+        self.etag = '"' + hashlib.sha1(self.body).hexdigest() + '"'
+
+
+class SnapshotDaemon:
+    """
+    Локальный HTTP/JSON-сервер поверх DataHub: один опрос API на хост,
+    сколько угодно клиентов читают готовый снимок.
+    """
+    def __init__(self, hub=None, host=DAEMON_HOST, port=DAEMON_PORT, socket_path=None):
+        self.hub = hub or get_hub()
+        self.host = host
+        self.port = port
+        self.socket_path = socket_path
+        self.resources = {}
+
+    # --- SNAPSHOT ---
+    def on_update(self, snapshot):
+        # вызывается из потока хаба; замена словаря целиком атомарна
+        resources = {}
+        for path, keys in VIEWS.items():
+            data = snapshot if keys is None else _view(snapshot, keys)
+            resources[path] = Resource(data)
+        resources["/"] = resources["/snapshot"]
+        self.resources = resources
+
+    # --- HTTP ---
+    def respond(self, method, path, headers):
+        if method not in ("GET", "HEAD"):
+            return self.build(405, b"", extra={"Allow": "GET, HEAD"})
+
+        path = path.split("?", 1)[0]
+        if path == "/health":
+            ready = bool(self.resources)
+            return self.build(200 if ready else 503, json.dumps({"ok": ready}).encode())
+
+        resource = self.resources.get(path)
+        if resource is None:
+            status = 503 if path in VIEWS and not self.resources else 404
+            return self.build(status, b"")
+
+        if headers.get("if-none-match") == resource.etag:
+            return self.build(304, b"", etag=resource.etag)
+        body = b"" if method == "HEAD" else resource.body
+        return self.build(200, body, etag=resource.etag, length=len(resource.body))
+
+    @staticmethod
+    def build(status, body, etag=None, length=None, extra=None):
+        lines = [
+            f"HTTP/1.1 {status} {STATUS_TEXT[status]}",
+            "Content-Type: application/json; charset=utf-8",
+            f"Content-Length: {len(body) if length is None else length}",
+            "Cache-Control: no-cache",
+        ]
+        if etag:
+            lines.append(f"ETag: {etag}")
+        for name, value in (extra or {}).items():
+            lines.append(f"{name}: {value}")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, version = request_line.decode("latin-1").split()
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                writer.write(self.respond(method, path, headers))
+                await writer.drain()
+
+                if version == "HTTP/1.0" or headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    # --- RUN ---
+    async def serve(self):
+        # клиенты демона приходят когда угодно — данные нужны всегда
+        self.hub.set_activity(self, ACTIVE)
+        self.hub.subscribe(self.on_update)
+        self.hub.start()
+
+        servers = [await asyncio.start_server(self.handle, self.host, self.port)]
+        log.info("Демон: http://%s:%s/snapshot", self.host, self.port)
+
+        if self.socket_path:
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+            servers.append(await asyncio.start_unix_server(self.handle, self.socket_path))
+            log.info("Демон: unix-сокет %s", self.socket_path)
+
+        try:
+            await asyncio.gather(*(server.serve_forever() for server in servers))
+        finally:
+            self.hub.remove_activity(self)
+            self.hub.unsubscribe(self.on_update)
+            self.hub.stop()
+            if self.socket_path and os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+
+def create_daemon(socket_path=None):
+    settings = load_settings()
+    warm_city_coordinates(settings["cities"])
+    return SnapshotDaemon(
+        port=settings.get("daemon_port", DAEMON_PORT),
+        socket_path=socket_path
+    )
+
+
+def run_daemon(socket_path=None):
+    daemon = create_daemon(socket_path)
+    try:
+        asyncio.run(daemon.serve())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,122 @@
+import asyncio
+import logging
+
+from app import api_currency, api_weather
+
+log = logging.getLogger(__name__)
+
+# общий срок на один цикл обновления: что не успело, считается ошибкой,
+# а успевшие источники показываются
+REFRESH_DEADLINE = 10
+
+
+# --- ASYNC API ---
+# HTTP-вызовы остаются синхронными (пул соединений, повторы, страхующие
+# запросы и предохранители в http_client/providers) и уходят в потоки,
+# а здесь они только выполняются одновременно
+async def get_rates(codes=None):
+    return await asyncio.to_thread(api_currency.get_rates, codes)
+
+
+async def get_city_coordinates(city, language="ru"):
+    return await asyncio.to_thread(api_weather.get_city_coordinates, city, language)
+
+
+async def get_weather_at(locations):
+    return await asyncio.to_thread(api_weather.get_weather_at, locations)
+
+
+async def get_weather(city):
+    coords = await get_city_coordinates(city)
+    if coords is None:
+        log.warning("Использую Минск по умолчанию")
+        coords = api_weather.DEFAULT_COORDS
+    return (await get_weather_at([coords]))[0][0]
+
+
+async def fetch_weather(cities):
+    """
+    Как api_weather.fetch_weather, но координаты всех городов ищутся
+    одновременно, и запросы прогноза по частям тоже уходят одновременно.
+    Ошибка любого запроса координат — ошибка всей загрузки погоды.
+    """
+    weather = {city: None for city in cities}
+    forecasts = dict(weather)
+    coords = await asyncio.gather(*(get_city_coordinates(city) for city in weather))
+    located = [(city, c) for city, c in zip(weather, coords) if c is not None]
+
+    step = api_weather.LOCATIONS_PER_REQUEST
+    chunks = [located[i:i + step] for i in range(0, len(located), step)]
+    answers = await asyncio.gather(*(
+        get_weather_at([c for _, c in chunk]) for chunk in chunks
+    ))
+    for chunk, items in zip(chunks, answers):
+        for (city, _), (current, forecast) in zip(chunk, items):
+            weather[city] = current
+            forecasts[city] = forecast
+
+    return weather, forecasts
+
+
+# --- REFRESH ---
+async def _collect(results, name, coro):
+    try:
+        results[name] = await coro
+    except Exception as e:
+        results[name] = e
+
+
+async def _rates(results, rates_date, have_previous):
+    await _collect(results, "rates", asyncio.to_thread(api_currency.fetch_rates_table))
+    rates = results["rates"]
+    if isinstance(rates, Exception) or rates[1] is None:
+        return
+    # таблица за прошлый день нужна раз в сутки, при смене даты курсов
+    if rates[1] != rates_date or not have_previous:
+        await _collect(results, "table_prev",
+                       asyncio.to_thread(api_currency.fetch_previous_table, rates[1]))
+
+
+async def refresh(sources, cities, rates_date=None, have_previous=False, deadline=None):
+    """
+    Загружает источники одновременно под общим сроком deadline секунд.
+    Возвращает {"weather": (погода, прогноз), "rates": (таблица, дата),
+    "table_prev": таблица}; вместо значения — исключение, если загрузка
+    не удалась или не уложилась в срок.
+    """
+    deadline = REFRESH_DEADLINE if deadline is None else deadline
+    results = {}
+    jobs = []
+    if "weather" in sources:
+        jobs.append(_collect(results, "weather", fetch_weather(cities)))
+    if "rates" in sources:
+        jobs.append(_rates(results, rates_date, have_previous))
+    if not jobs:
+        return results
+
+    tasks = [asyncio.ensure_future(job) for job in jobs]
+    _, pending = await asyncio.wait(tasks, timeout=deadline)
+    # запросы в потоках дорабатывают в фоне, их ответы просто не ждём
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.wait(pending)
+    for name in sources:
+        results.setdefault(name, TimeoutError(f"нет ответа за {deadline} с"))
+    return results
+
+
+class FetchEngine:
+    """
+    Свой event loop в потоке хаба: цикл обновления синхронный снаружи
+    и одновременный внутри. asyncio.run на каждый цикл не подходит —
+    при закрытии он ждёт все потоки, в том числе опоздавшие запросы.
+    """
+    def __init__(self, deadline=None):
+        self.deadline = deadline
+        self.loop = asyncio.new_event_loop()
+
+    def refresh(self, sources, cities, rates_date=None, have_previous=False):
+        return self.loop.run_until_complete(
+            refresh(sources, cities, rates_date, have_previous, self.deadline)
+        )
@@ -0,0 +1,128 @@
+import bisect
+import datetime
+import math
+from array import array
+
+# что запрашиваем у Open-Meteo вместе с текущей погодой
+HOURLY_FIELDS = ("temperature_2m", "weathercode")
+DAILY_FIELDS = ("weathercode", "temperature_2m_max", "temperature_2m_min")
+FORECAST_DAYS = 7
+
+
+def _floats(values):
+    # пропуски в рядах Open-Meteo приходят как null
+    return array("f", (math.nan if v is None else v for v in values))
+
+
+def _json_floats(values):
+    return [None if math.isnan(v) else round(v, 1) for v in values]
+
+
+def _codes(values):
+    return array("h", (0 if v is None else v for v in values))
+
+
+class Forecast:
+    """
+    Почасовой и дневной прогноз одной точки по столбцам: время и значения
+    хранятся в типизированных массивах, а не в списке словарей.
+    """
+    __slots__ = (
+        "hour_time", "hour_temp", "hour_code",
+        "day_date", "day_max", "day_min", "day_code"
+    )
+
+    def __init__(self):
+        # unix-время начала часа / порядковый номер дня (date.toordinal)
+        self.hour_time = array("q")
+        self.hour_temp = array("f")
+        self.hour_code = array("h")
+        self.day_date = array("i")
+        self.day_max = array("f")
+        self.day_min = array("f")
+        self.day_code = array("h")
+
+    @classmethod
+    def from_api(cls, item):
+        forecast = cls()
+        tz = datetime.timezone(datetime.timedelta(seconds=item.get("utc_offset_seconds", 0)))
+
+        hourly = item.get("hourly") or {}
+        forecast.hour_time = array("q", (
+            int(datetime.datetime.fromisoformat(t).replace(tzinfo=tz).timestamp())
+            for t in hourly.get("time", [])
+        ))
+        forecast.hour_temp = _floats(hourly.get("temperature_2m", []))
+        forecast.hour_code = _codes(hourly.get("weathercode", []))
+
+        daily = item.get("daily") or {}
+        forecast.day_date = array("i", (
+            datetime.date.fromisoformat(d).toordinal() for d in daily.get("time", [])
+        ))
+        forecast.day_max = _floats(daily.get("temperature_2m_max", []))
+        forecast.day_min = _floats(daily.get("temperature_2m_min", []))
+        forecast.day_code = _codes(daily.get("weathercode", []))
+        return forecast
+
+    @classmethod
+    def from_dict(cls, data):
+        """Обратно из to_dict() — например, из общего снимка другого процесса."""
+        forecast = cls()
+        hourly, daily = data["hourly"], data["daily"]
+        forecast.hour_time = array("q", hourly["time"])
+        forecast.hour_temp = _floats(hourly["temperature"])
+        forecast.hour_code = _codes(hourly["code"])
+        forecast.day_date = array("i", (
+            datetime.date.fromisoformat(d).toordinal() for d in daily["date"]
+        ))
+        forecast.day_max = _floats(daily["max"])
+        forecast.day_min = _floats(daily["min"])
+        forecast.day_code = _codes(daily["code"])
+        return forecast
+
+    def hours(self, now, hours=24, buckets=6):
+        """
+        Ближайшие hours часов, прореженные до buckets точек:
+        [(время начала, средняя температура, самый "тяжёлый" код погоды)].
+        """
+        start = max(bisect.bisect_right(self.hour_time, now) - 1, 0)
+        end = min(start + hours, len(self.hour_time))
+        step = max((end - start) // buckets, 1)
+
+        result = []
+        for i in range(start, end, step):
+            temps = [t for t in self.hour_temp[i:min(i + step, end)] if not math.isnan(t)]
+            if not temps:
+                continue
+            result.append((
+                self.hour_time[i],
+                sum(temps) / len(temps),
+                max(self.hour_code[i:min(i + step, end)])
+            ))
+        return result[:buckets]
+
+    def days(self, today, count=6):
+        """
+        Дни начиная с today: [(date, минимум, максимум, код погоды)].
+        """
+        start = bisect.bisect_left(self.day_date, today.toordinal())
+        return [
+            (datetime.date.fromordinal(self.day_date[i]),
+             self.day_min[i], self.day_max[i], self.day_code[i])
+            for i in range(start, min(start + count, len(self.day_date)))
+        ]
+
+    def to_dict(self):
+        return {
+            "hourly": {
+                "time": self.hour_time.tolist(),
+                "temperature": _json_floats(self.hour_temp),
+                "code": self.hour_code.tolist()
+            },
+            "daily": {
+                "date": [datetime.date.fromordinal(d).isoformat() for d in self.day_date],
+                "max": _json_floats(self.day_max),
+                "min": _json_floats(self.day_min),
+                "code": self.day_code.tolist()
+            }
+        }
@@ -0,0 +1,64 @@
+import json
+import os
+import tempfile
+import threading
+
+_umask = None
+_umask_lock = threading.Lock()
+
+
+def _read_umask():
+    """
+    umask процесса. os.umask умеет только менять его, поэтому сначала
+    пробуем /proc (Linux) — без окна, в котором другие потоки создавали
+    бы файлы с правами 0666.
+    """
+    global _umask
+    with _umask_lock:
+        if _umask is None:
+            try:
+                with open("/proc/self/status", encoding="ascii") as f:
+                    _umask = next(int(line.split()[1], 8) for line in f if line.startswith("Umask:"))
+            except (OSError, StopIteration, ValueError):
+                _umask = os.umask(0o077)
+                os.umask(_umask)
+        return _umask
+
+
+def _file_mode(path):
+    # mkstemp создаёт файл с правами 0600; новому файлу даём права по umask, как у open()
+    try:
+        return os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        return 0o666 & ~_read_umask()
+
+
+def atomic_write_bytes(path, data, suffix=".tmp"):
+    """
+    Атомарная запись: временный файл рядом с целевым, fsync, rename.
+    При сбое посреди записи старый файл остаётся целым, права файла сохраняются.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    mode = _file_mode(path)
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", suffix=suffix, dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            if hasattr(os, "fchmod"):
+                os.fchmod(f.fileno(), mode)
+            else:
+                os.chmod(tmp, mode)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_write_json(path, data):
+    body = json.dumps(data, ensure_ascii=False, indent=4).encode("utf-8")
+    atomic_write_bytes(path, body, suffix=".json")
@@ -0,0 +1,209 @@
+import bisect
+import csv
+import logging
+import mmap
+import os
+import struct
+import threading
+
+from app.fsutil import atomic_write_bytes
+
+log = logging.getLogger(__name__)
+
+# встроенный справочник городов (названия на русском и английском) и собранный из него индекс
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+GAZETTEER_CSV = os.path.join(DATA_DIR, "cities.csv")
+GAZETTEER_INDEX = os.path.join(DATA_DIR, "cities.idx")
+
+# формат индекса: заголовок, записи фиксированной длины, отсортированные по ключу,
+# затем блок строк (ключи и названия в UTF-8)
+MAGIC = b"CWSG"
+VERSION = 1
+HEADER = struct.Struct("<4sHI")
+# смещение и длина ключа, смещение и длина названия, широта, долгота, код страны
+RECORD = struct.Struct("<IHIHff2s")
+
+
+def normalize(name):
+    return " ".join(name.split()).casefold().replace("ё", "е")
+
+
+def build_index(rows):
+    """
+    Собирает индекс из строк CSV (name, country, latitude, longitude).
+    При совпадении ключей остаётся первая запись.
+    """
+    entries = {}
+    for row in rows:
+        key = normalize(row["name"]).encode("utf-8")
+        entries.setdefault(key, row)
+
+    records = []
+    blob = bytearray()
+    for key in sorted(entries):
+        row = entries[key]
+        name = row["name"].strip().encode("utf-8")
+        key_off = len(blob)
+        blob += key
+        name_off = len(blob)
+        blob += name
+        records.append(RECORD.pack(
+            key_off, len(key), name_off, len(name),
+            float(row["latitude"]), float(row["longitude"]),
+            row["country"].encode("ascii")[:2]
+        ))
+
+    return HEADER.pack(MAGIC, VERSION, len(records)) + b"".join(records) + bytes(blob)
+
+
+def _distance(a, b, limit):
+    """
+    Расстояние Левенштейна с ранним выходом: больше limit — limit + 1.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb)
+            ))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class _Keys:
+    """Последовательность ключей индекса для bisect без распаковки всех записей."""
+    def __init__(self, gazetteer):
+        self.gazetteer = gazetteer
+
+    def __len__(self):
+        return self.gazetteer.count
+
+    def __getitem__(self, i):
+        return self.gazetteer.key(i)
+
+
+class Gazetteer:
+    """
+    Поиск городов по индексу в памяти (mmap файла или готовые байты):
+    точное совпадение и префикс — бинарным поиском, опечатки — по Левенштейну.
+    """
+    def __init__(self, buf):
+        magic, version, count = HEADER.unpack_from(buf, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("неизвестный формат индекса городов")
+        self.buf = buf
+        self.count = count
+        self.blob = HEADER.size + count * RECORD.size
+        self.keys = _Keys(self)
+
+    @classmethod
+    def open(cls, path):
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def _record(self, i):
+        return RECORD.unpack_from(self.buf, HEADER.size + i * RECORD.size)
+
+    def key(self, i):
+        key_off, key_len = self._record(i)[:2]
+        start = self.blob + key_off
+        return self.buf[start:start + key_len]
+
+    def name(self, i):
+        name_off, name_len = self._record(i)[2:4]
+        start = self.blob + name_off
+        return self.buf[start:start + name_len].decode("utf-8")
+
+    def _range(self, prefix):
+        # все ключи с префиксом prefix лежат подряд
+        lo = bisect.bisect_left(self.keys, prefix)
+        hi = lo
+        while hi < self.count and self.key(hi).startswith(prefix):
+            hi += 1
+        return lo, hi
+
+    def lookup(self, city):
+        """Координаты (lat, lon) или None, если города нет в справочнике."""
+        key = normalize(city).encode("utf-8")
+        i = bisect.bisect_left(self.keys, key)
+        if i == self.count or self.key(i) != key:
+            return None
+        lat, lon = self._record(i)[4:6]
+        return round(lat, 4), round(lon, 4)
+
+    def prefix(self, text, limit=10):
+        lo, hi = self._range(normalize(text).encode("utf-8"))
+        return [self.name(i) for i in range(lo, min(hi, lo + limit))]
+
+    def fuzzy(self, text, max_distance=2, limit=5):
+        """
+        Похожие названия. Первую букву считаем верной: кандидаты
+        берутся из её диапазона, так что сравнений немного.
+        """
+        query = normalize(text)
+        if not query:
+            return []
+        lo, hi = self._range(query[0].encode("utf-8"))
+        scored = []
+        for i in range(lo, hi):
+            key = self.key(i).decode("utf-8")
+            # опечатка в начале длинного названия тоже считается
+            d = min(
+                _distance(query, key, max_distance),
+                _distance(query, key[:len(query)], max_distance)
+            )
+            if d <= max_distance:
+                scored.append((d, i))
+        scored.sort()
+        return [self.name(i) for _, i in scored[:limit]]
+
+    def suggest(self, text, limit=10):
+        return self.prefix(text, limit) or self.fuzzy(text, limit=limit)
+
+
+def load_gazetteer(csv_path=GAZETTEER_CSV, index_path=GAZETTEER_INDEX):
+    """
+    Открывает индекс; если его нет или справочник новее — пересобирает.
+    Без прав на запись индекс остаётся только в памяти.
+    """
+    if not os.path.exists(csv_path):
+        return None
+    try:
+        if (os.path.exists(index_path)
+                and os.path.getmtime(index_path) >= os.path.getmtime(csv_path)):
+            return Gazetteer.open(index_path)
+    except Exception as e:
+        log.warning("Индекс городов повреждён, пересобираем: %s", e)
+
+    with open(csv_path, "r", encoding="utf-8", newline="") as f:
+        data = build_index(csv.DictReader(f))
+    try:
+        atomic_write_bytes(index_path, data, suffix=".idx")
+        return Gazetteer.open(index_path)
+    except OSError as e:
+        log.warning("Не удалось сохранить индекс городов: %s", e)
+        return Gazetteer(data)
+
+
+_gazetteer = None
+_gazetteer_loaded = False
+_gazetteer_lock = threading.Lock()
+
+
+def get_gazetteer():
+    global _gazetteer, _gazetteer_loaded
+    with _gazetteer_lock:
+        if not _gazetteer_loaded:
+            try:
+                _gazetteer = load_gazetteer()
+            except Exception as e:
+                log.error("Ошибка загрузки справочника городов: %s", e)
+            _gazetteer_loaded = True
+        return _gazetteer
@@ -0,0 +1,106 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from app import metrics
+from app.fsutil import atomic_write_json
+
+log = logging.getLogger(__name__)
+
+GEO_CACHE_FILE = "geocache.json"
+
+MAX_ENTRIES = 256
+# координаты городов не меняются, поэтому TTL большой
+TTL = 90 * 24 * 3600
+# "город не найден" помним недолго: опечатку могут исправить в API
+NEGATIVE_TTL = 24 * 3600
+
+# маркер промаха; None в кэше означает "город не найден"
+MISS = object()
+
+
+class GeoCache:
+    """
+    Дисковый LRU-кэш геокодинга: ключ — нормализованное имя города и язык.
+    """
+    def __init__(self, path=GEO_CACHE_FILE, max_entries=MAX_ENTRIES,
+                 ttl=TTL, negative_ttl=NEGATIVE_TTL):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def make_key(city, language):
+        return f"{language}:{' '.join(city.split()).casefold()}"
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for key, entry in data.items():
+                self._entries[key] = entry
+        except Exception as e:
+            log.error("Ошибка чтения кэша геокодинга: %s", e)
+            self._entries.clear()
+
+    def _save(self):
+        try:
+            atomic_write_json(self.path, dict(self._entries))
+        except Exception as e:
+            log.error("Ошибка записи кэша геокодинга: %s", e)
+
+    def get(self, city, language="ru"):
+        """
+        Возвращает (lat, lon), None для закэшированного "не найден"
+        или MISS, если записи нет или она устарела.
+        """
+        key = self.make_key(city, language)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                metrics.cache_requests.inc(cache="geocoding", result="miss")
+                return MISS
+
+            coords = entry["coords"]
+            ttl = self.ttl if coords is not None else self.negative_ttl
+            if time.time() - entry["ts"] > ttl:
+                del self._entries[key]
+                metrics.cache_requests.inc(cache="geocoding", result="miss")
+                return MISS
+
+            metrics.cache_requests.inc(cache="geocoding", result="hit")
+            self._entries.move_to_end(key)
+            return tuple(coords) if coords is not None else None
+
+    def put(self, city, coords, language="ru"):
+        key = self.make_key(city, language)
+        with self._lock:
+            self._entries[key] = {
+                "coords": list(coords) if coords is not None else None,
+                "ts": time.time()
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._save()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_geo_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = GeoCache()
+        return _cache
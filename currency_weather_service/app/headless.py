@@ -0,0 +1,28 @@
+import threading
+
+from app.api_weather import warm_city_coordinates
+from app.notifier import log_notify
+from app.settings import load_settings
+from app.worker import BackgroundWorker
+
+# режим без GUI: ни Qt, ни Pillow, уведомления — в лог
+
+
+def create_headless():
+    warm_city_coordinates(load_settings()["cities"])
+    worker = BackgroundWorker(notifier=log_notify)
+    worker.start()
+    return worker
+
+
+def serve(worker):
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        worker.stop()
+
+
+def run_headless():
+    serve(create_headless())
@@ -0,0 +1,318 @@
+import hashlib
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+from app import metrics
+
+# отдельные таймауты на установку соединения и на чтение ответа
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 5
+
+# не больше стольких одновременных соединений на один хост
+POOL_MAXSIZE = 4
+# хостов у нас три: api.nbrb.by, api.open-meteo.com, geocoding-api.open-meteo.com
+POOL_CONNECTIONS = 8
+
+RETRY_TOTAL = 3
+RETRY_BACKOFF = 0.5
+RETRY_STATUSES = (500, 502, 503, 504)
+
+# сколько ответов API держать в памяти для условных запросов
+RESPONSE_CACHE_SIZE = 64
+
+
+def endpoint_label(url):
+    """
+    Метка эндпоинта для метрик: хост и путь, числовые ID заменены на {id}.
+    """
+    parts = urlsplit(url)
+    return parts.netloc + re.sub(r"/\d+(?=/|$)", "/{id}", parts.path)
+
+
+class ConnectionStats:
+    """
+    Счётчики соединений: сколько создано заново и сколько взято из пула.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.created = 0
+        self.acquired = 0
+
+    def on_created(self):
+        with self._lock:
+            self.created += 1
+
+    def on_acquired(self):
+        with self._lock:
+            self.acquired += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "created": self.created,
+                "reused": max(self.acquired - self.created, 0),
+                "acquired": self.acquired
+            }
+
+
+stats = ConnectionStats()
+
+
+class _CountingMixin:
+    def _new_conn(self):
+        stats.on_created()
+        return super()._new_conn()
+
+    def _get_conn(self, timeout=None):
+        stats.on_acquired()
+        return super()._get_conn(timeout)
+
+
+class CountingHTTPConnectionPool(_CountingMixin, HTTPConnectionPool):
+    pass
+
+
+class CountingHTTPSConnectionPool(_CountingMixin, HTTPSConnectionPool):
+    pass
+
+
+class JitterRetry(Retry):
+    """
+    Экспоненциальная задержка между повторами плюс случайный разброс,
+    чтобы несколько клиентов не повторяли запросы синхронно.
+    """
+    def increment(self, method=None, url=None, response=None, error=None,
+                  _pool=None, _stacktrace=None):
+        host = _pool.host if _pool is not None else ""
+        metrics.http_retries.inc(endpoint=endpoint_label(f"//{host}{url or ''}"))
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+    def get_backoff_time(self):
+        backoff = super().get_backoff_time()
+        if backoff <= 0:
+            return 0
+        return backoff + random.uniform(0, backoff)
+
+
+class PooledAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": CountingHTTPConnectionPool,
+            "https": CountingHTTPSConnectionPool
+        }
+
+
+def create_session():
+    retry = JitterRetry(
+        total=RETRY_TOTAL,
+        connect=RETRY_TOTAL,
+        read=RETRY_TOTAL,
+        status=RETRY_TOTAL,
+        backoff_factor=RETRY_BACKOFF,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET"}),
+        raise_on_status=False
+    )
+    adapter = PooledAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        pool_block=True,
+        max_retries=retry
+    )
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["User-Agent"] = "CurrencyWeatherService"
+    return session
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session()
+        return _session
+
+
+def get(url, params=None, timeout=None, headers=None):
+    timeout = timeout or (CONNECT_TIMEOUT, READ_TIMEOUT)
+    endpoint = endpoint_label(url)
+    try:
+        with metrics.http_request_seconds.time(endpoint=endpoint):
+            resp = get_session().get(url, params=params, timeout=timeout, headers=headers)
+        resp.raise_for_status()
+    except Exception:
+        metrics.http_errors.inc(endpoint=endpoint)
+        raise
+    return resp
+
+
+# --- RESPONSE CACHE ---
+class CacheEntry:
+    __slots__ = ("etag", "last_modified", "expires", "digest", "size", "data")
+
+    def __init__(self, etag, last_modified, expires, digest, size, data):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires = expires
+        self.digest = digest
+        self.size = size
+        self.data = data
+
+
+def max_age(cache_control):
+    """
+    Сколько секунд ответ свежий по Cache-Control: 0 — проверять
+    перед каждым использованием, None — не хранить вовсе.
+    """
+    directives = {}
+    for part in cache_control.lower().split(","):
+        name, _, value = part.strip().partition("=")
+        directives[name] = value.strip('"')
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0
+    try:
+        return max(int(directives.get("max-age", 0)), 0)
+    except ValueError:
+        return 0
+
+
+class ResponseCache:
+    """
+    Последние ответы API вместе с валидаторами (ETag, Last-Modified)
+    и сроком свежести из Cache-Control, с вытеснением давно не нужных.
+    """
+    def __init__(self, max_entries=RESPONSE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(url, params=None):
+        return url + "?" + urlencode(sorted(params.items())) if params else url
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+response_cache = ResponseCache()
+
+
+def _cache_result(provider, result, received=0, saved=0):
+    metrics.http_cache_requests.inc(provider=provider, result=result)
+    if received:
+        metrics.http_cache_bytes.inc(received, provider=provider, kind="received")
+    if saved:
+        metrics.http_cache_bytes.inc(saved, provider=provider, kind="saved")
+
+
+def get_json(url, params=None, timeout=None):
+    """
+    Разобранный JSON-ответ через кэш ответов. Пока ответ свежий, запрос
+    не отправляется; затем уходит условный запрос, и на 304 или тело
+    с тем же хэшем возвращается уже разобранный объект — без загрузки
+    или без разбора. Результат общий для всех вызовов: не изменять.
+    """
+    provider = urlsplit(url).netloc
+    key = ResponseCache.make_key(url, params)
+    entry = response_cache.get(key)
+    if entry is not None and entry.expires > time.time():
+        _cache_result(provider, "fresh", saved=entry.size)
+        return entry.data
+
+    headers = {}
+    if entry is not None and entry.etag:
+        headers["If-None-Match"] = entry.etag
+    if entry is not None and entry.last_modified:
+        headers["If-Modified-Since"] = entry.last_modified
+
+    resp = get(url, params=params, timeout=timeout, headers=headers)
+    age = max_age(resp.headers.get("Cache-Control", ""))
+
+    etag = resp.headers.get("ETag")
+    last_modified = resp.headers.get("Last-Modified")
+    if resp.status_code == 304 and entry is not None:
+        _cache_result(provider, "not_modified", saved=entry.size)
+        # 304 может не повторять валидаторы — остаются прежние
+        etag = etag or entry.etag
+        last_modified = last_modified or entry.last_modified
+        size, digest, data = entry.size, entry.digest, entry.data
+    else:
+        body = resp.content
+        size = len(body)
+        digest = hashlib.sha1(body).digest()
+        if entry is not None and digest == entry.digest:
+            # валидаторов нет или сервер их игнорирует, но тело то же
+            _cache_result(provider, "unchanged", received=len(body))
+            data = entry.data
+        else:
+            _cache_result(provider, "miss", received=len(body))
+            data = resp.json()
+
+    if age is not None:
+        response_cache.put(key, CacheEntry(
+            etag, last_modified, time.time() + age, digest, size, data
+        ))
+    return data
+
+
+def get_stats():
+    return stats.snapshot()
+
+
+def get_cache_stats():
+    """
+    Доля ответов, обошедшихся без загрузки или без разбора JSON,
+    и сэкономленные байты — по каждому провайдеру (хосту API).
+    """
+    result = {}
+    for item in metrics.http_cache_requests.as_list():
+        provider = result.setdefault(item["labels"]["provider"], {
+            "requests": 0, "fresh": 0, "not_modified": 0, "unchanged": 0, "miss": 0,
+            "bytes_received": 0, "bytes_saved": 0
+        })
+        provider["requests"] += item["value"]
+        provider[item["labels"]["result"]] += item["value"]
+    for item in metrics.http_cache_bytes.as_list():
+        provider = result.get(item["labels"]["provider"])
+        if provider is not None:
+            provider["bytes_" + item["labels"]["kind"]] += item["value"]
+
+    for provider in result.values():
+        hits = provider["fresh"] + provider["not_modified"] + provider["unchanged"]
+        provider["hit_ratio"] = round(hits / provider["requests"], 3)
+        downloaded = provider["bytes_received"] + provider["bytes_saved"]
+        provider["bytes_saved_ratio"] = round(provider["bytes_saved"] / downloaded, 3) if downloaded else 0.0
+    return result
@@ -0,0 +1,402 @@
+import logging
+import os
+import threading
+import time
+
+from app import metrics
+from app.activity import ACTIVE, HIDDEN, IDLE, Activity
+from app.api_currency import CURRENCY_IDS
+from app.fetch_engine import FetchEngine
+from app.rate_history import RateHistory
+from app.scheduler import RatesPolicy, Scheduler, WeatherPolicy
+from app.settings import flush_settings, load_settings
+from app.shared_snapshot import SharedSnapshot
+from app.snapshot_cache import load_snapshot, save_snapshot
+
+log = logging.getLogger(__name__)
+
+SOURCES = ("weather", "rates")
+
+# как часто ведомый проверяет общий снимок и не пора ли ему стать лидером
+FOLLOW_INTERVAL = 1.0
+# то же, пока данные никто не видит или пользователь отошёл; лидер так же редко
+# сам проверяет ведомых и настройки — просьбы обновить его будят
+BACKGROUND_POLL = 30
+# во сколько раз реже опрашивать API, пока пользователь отошёл
+IDLE_STRETCH = 4
+
+
+class DataHub:
+    """
+    Общий источник данных для окна и трея: единственное расписание опроса
+    API, последний снимок и рассылка обновлений подписчикам.
+
+    С shared (SharedSnapshot) хаб делит снимок с другими процессами:
+    опрашивает API и публикует снимок только лидер, остальные его читают.
+    Когда лидер завершается, его место занимает один из ведомых.
+    """
+    def __init__(self, cities, scheduler=None, history=None, shared=None, engine=None):
+        self.cities = list(cities)
+        self.history = history or RateHistory()
+        # погода и курсы загружаются одновременно под общим сроком
+        self.engine = engine or FetchEngine()
+        self.shared = shared
+        self._followed = None
+        # кому нужны данные: окно на виду или свёрнуто, трей, демон
+        self.activity = Activity()
+        self._level = ACTIVE
+        self.scheduler = scheduler or Scheduler({
+            "weather": WeatherPolicy(),
+            "rates": RatesPolicy()
+        })
+        self.snapshot = {
+            "cities": self.cities,
+            # {город: погода}, None — город не найден
+            "weather": None,
+            "weather_updated": None,
+            # {город: Forecast} — почасовой и дневной прогноз, на диск не пишется
+            "forecast": None,
+            "rates": None,
+            # вся таблица НБ РБ {код: BYN за единицу} и она же за прошлый день — для кросс-курсов
+            "table": None,
+            "table_prev": None,
+            "rates_date": None,
+            "rates_updated": None,
+            "updated": None,
+            "error": None,
+            # данные из дискового кэша или оставшиеся после ошибки
+            "stale": False
+        }
+        self.load_cached()
+
+        self._subscribers = []
+        # подписчики, ещё не получившие последний снимок
+        self._welcome = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._forced = set()
+        self._in_flight = False
+        self._thread = None
+
+    def load_cached(self):
+        """
+        Подхватывает последний снимок с диска: его показывают сразу,
+        а фоновая загрузка затем заменяет. Курсы на сегодня повторно
+        не запрашиваются.
+        """
+        cached = load_snapshot()
+        if cached is None:
+            return
+
+        weather = {
+            city: data for city, data in (cached["weather"] or {}).items()
+            if city in self.cities
+        }
+        cached["weather"] = weather or None
+        if not weather:
+            cached["weather_updated"] = None
+        cached["cities"] = self.cities
+
+        self.snapshot.update(cached, stale=True)
+        if cached["rates"] is not None and cached["rates_updated"] is not None:
+            self.scheduler.record_success(
+                "rates", cached["rates_updated"], cached["rates"], cached["rates_date"]
+            )
+
+    # --- SUBSCRIBERS ---
+    def subscribe(self, on_update, on_refresh_start=None):
+        """
+        on_update(snapshot) вызывается из потока хаба: сначала с последним
+        снимком (если он есть), затем после каждого обновления;
+        on_refresh_start() — перед началом загрузки.
+        """
+        with self._lock:
+            self._subscribers.append((on_update, on_refresh_start))
+            self._welcome.append(on_update)
+        self._wakeup.set()
+
+    def unsubscribe(self, on_update):
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s[0] != on_update]
+            self._welcome = [s for s in self._welcome if s != on_update]
+
+    def welcome(self):
+        """Последний снимок новым подписчикам — в потоке хаба, как и обновления."""
+        with self._lock:
+            pending, self._welcome = self._welcome, []
+            snapshot = self.snapshot
+        if snapshot["updated"] is None:
+            return
+        for on_update in pending:
+            try:
+                on_update(snapshot)
+            except Exception as e:
+                log.exception("Ошибка подписчика: %s", e)
+
+    # --- CONTROL ---
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self.loop, daemon=True)
+            self._thread.start()
+        if self.shared is None:
+            self.history.backfill_async()
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+        if self.shared is not None:
+            # блокировка снимается сразу — ведомый подхватит опрос без паузы
+            self.shared.release()
+
+    def set_activity(self, consumer, level):
+        """
+        Уровень активности потребителя (activity.ACTIVE/IDLE/HIDDEN). Когда
+        данные снова на виду, цикл просыпается сразу и загружает то, чей
+        срок прошёл, пока опрос стоял.
+        """
+        if self.activity.set(consumer, level):
+            self._wakeup.set()
+
+    def remove_activity(self, consumer):
+        self.activity.remove(consumer)
+
+    def request_refresh(self, sources=SOURCES, force=False):
+        """
+        Просит обновить данные вне расписания. Пока загрузка уже идёт,
+        повторные запросы (например, частые нажатия "Обновить") ничего не добавляют.
+        """
+        with self._lock:
+            if self._in_flight and not force:
+                return
+            self._forced.update(sources)
+        self._wakeup.set()
+
+    def set_cities(self, cities):
+        cities = list(cities)
+        with self._lock:
+            if cities == self.cities:
+                return
+            self.cities = cities
+            self.scheduler.reset("weather")
+        self.request_refresh(("weather",), force=True)
+
+    # --- LOOP ---
+    def loop(self):
+        while not self._stopped.is_set():
+            try:
+                timeout = self.cycle()
+            except Exception as e:
+                # один неудачный цикл не должен останавливать опрос
+                log.exception("Ошибка цикла обновления: %s", e)
+                timeout = BACKGROUND_POLL
+            # ожидание прерывается событием: просьба обновить, окно на виду, stop()
+            self._wakeup.wait(timeout)
+
+    def cycle(self):
+        """Один проход цикла; возвращает, сколько ждать следующего (None — до события)."""
+        with self._lock:
+            self._wakeup.clear()
+            forced, self._forced = self._forced, set()
+        self.welcome()
+
+        level = self.activity_level()
+        resumed = level < HIDDEN <= self._level
+        self._level = level
+
+        if not self.lead():
+            # ведомый: API не опрашивает, просьбы обновить передаёт лидеру
+            if forced:
+                # новые города из настроек лидер прочитает, как только проснётся
+                flush_settings()
+                self.shared.request_refresh()
+            if level < HIDDEN:
+                self.shared.signal_demand(time.time(), force=resumed)
+            self.follow()
+            return FOLLOW_INTERVAL if level == ACTIVE else BACKGROUND_POLL
+
+        if self.shared is not None:
+            forced |= self.followers_requests()
+        stretch = IDLE_STRETCH if level == IDLE else 1
+        sources = set(forced)
+        # свёрнутое окно данные не показывает: загрузка только по просьбе
+        if level < HIDDEN:
+            sources |= set(self.scheduler.due_sources(time.time(), stretch))
+        if sources:
+            self.refresh(sources)
+
+        timeout = None
+        if level < HIDDEN:
+            timeout = self.scheduler.seconds_until_next(time.time(), stretch)
+        if level == IDLE or self.shared is not None:
+            # отошедшего пользователя и отметки ведомых проверяем сами, но редко
+            timeout = BACKGROUND_POLL if timeout is None else min(timeout, BACKGROUND_POLL)
+        return timeout
+
+    def activity_level(self):
+        if self.shared is not None and self.shared.is_leader and self.shared.has_demand(time.time()):
+            # данные на виду в другом экземпляре
+            return self.activity.level(ACTIVE)
+        return self.activity.level()
+
+    # --- SHARED SNAPSHOT ---
+    def lead(self):
+        """
+        Опрашивает ли API этот процесс. Ведомый пробует занять место лидера
+        на каждой проверке — так он сменяет завершившийся процесс.
+        """
+        if self.shared is None or self.shared.is_leader:
+            return True
+        try:
+            if not self.shared.try_lead(self._wakeup.set):
+                return False
+        except OSError as e:
+            log.warning("Общий снимок недоступен, данные загружаются отдельно: %s", e)
+            self.shared = None
+        else:
+            log.info("Процесс %s опрашивает API для остальных экземпляров", os.getpid())
+        self.history.backfill_async()
+        return True
+
+    def follow(self):
+        snapshot = self.shared.read()
+        if snapshot is None or snapshot is self._followed:
+            return
+        self._followed = snapshot
+        # если процесс станет лидером, свежие данные лидера не запрашиваются повторно
+        if snapshot["weather_updated"] is not None:
+            self.scheduler.record_success("weather", snapshot["weather_updated"], snapshot["weather"])
+        if snapshot["rates_updated"] is not None:
+            self.scheduler.record_success(
+                "rates", snapshot["rates_updated"], snapshot["rates"], snapshot["rates_date"]
+            )
+        self.deliver(snapshot)
+
+    def followers_requests(self):
+        """
+        Что обновить по просьбе ведомых: кнопка "Обновить" в их окнах
+        или новые города в общих настройках.
+        """
+        sources = set(SOURCES) if self.shared.take_requests() else set()
+        cities = load_settings()["cities"]
+        if cities != self.cities:
+            with self._lock:
+                self.cities = cities
+                self.scheduler.reset("weather")
+            sources.add("weather")
+        return sources
+
+    def refresh(self, sources=SOURCES):
+        try:
+            with metrics.refresh_seconds.time():
+                self._refresh(set(sources))
+        finally:
+            # и после ошибки следующее "Обновить" должно сработать
+            with self._lock:
+                self._in_flight = False
+
+    def _refresh(self, sources):
+        with self._lock:
+            self._in_flight = True
+            cities = self.cities
+            subscribers = list(self._subscribers)
+
+        for _, on_refresh_start in subscribers:
+            if on_refresh_start is not None:
+                on_refresh_start()
+
+        previous = self.snapshot
+        snapshot = dict(previous, cities=cities, error=None)
+        if previous["cities"] != cities:
+            snapshot["weather"] = None
+            snapshot["forecast"] = None
+            snapshot["weather_updated"] = None
+        errors = []
+
+        # каждый источник — результат или исключение; успевшие применяются,
+        # даже если другой источник не уложился в срок
+        results = self.engine.refresh(
+            sources, cities, previous["rates_date"], bool(previous["table_prev"])
+        )
+
+        weather = results.get("weather")
+        if isinstance(weather, Exception):
+            self.scheduler.record_failure("weather", time.time())
+            metrics.refresh_errors.inc(source="weather")
+            errors.append(f"погода: {weather}")
+        elif weather is not None:
+            snapshot["weather"], snapshot["forecast"] = weather
+            snapshot["weather_updated"] = snapshot["updated"] = time.time()
+            self.scheduler.record_success("weather", time.time(), snapshot["weather"])
+
+        loaded = results.get("rates")
+        if isinstance(loaded, Exception):
+            self.scheduler.record_failure("rates", time.time())
+            metrics.refresh_errors.inc(source="rates")
+            errors.append(f"курсы: {loaded}")
+        elif loaded is not None:
+            table, rates_date = loaded
+            rates = {code: table[code] for code in CURRENCY_IDS if code in table}
+            if rates_date != previous["rates_date"] or not previous["table_prev"]:
+                snapshot["table_prev"] = self.previous_table(results.get("table_prev"))
+            snapshot["rates"] = rates
+            snapshot["table"] = table
+            snapshot["rates_date"] = rates_date
+            snapshot["rates_updated"] = snapshot["updated"] = time.time()
+            self.scheduler.record_success("rates", time.time(), rates, rates_date)
+            try:
+                self.history.record(rates, rates_date)
+            except OSError as e:
+                # без записи истории снимок всё равно показывается и сохраняется
+                log.error("Ошибка записи истории курсов: %s", e)
+
+        # при ошибке остаются прежние данные — это офлайн-фолбэк
+        snapshot["stale"] = bool(errors)
+        if errors:
+            snapshot["error"] = "; ".join(errors)
+            log.error("Ошибка обновления: %s", snapshot["error"])
+        if len(errors) < len(sources):
+            save_snapshot(snapshot)
+        if self.shared is not None and self.shared.is_leader:
+            self.shared.publish(snapshot)
+
+        self.deliver(snapshot)
+
+    def deliver(self, snapshot):
+        with self._lock:
+            self.snapshot = snapshot
+            self._in_flight = False
+            subscribers = list(self._subscribers)
+            # этот снимок получат все, в том числе ещё не поприветствованные
+            self._welcome = []
+
+        for on_update, _ in subscribers:
+            try:
+                on_update(snapshot)
+            except Exception as e:
+                log.exception("Ошибка подписчика: %s", e)
+
+    @staticmethod
+    def previous_table(result):
+        """
+        Таблица за прошлый день — раз в сутки, при смене даты курсов.
+        Без неё кросс-курсы просто показываются без изменения.
+        """
+        if isinstance(result, Exception):
+            log.warning("Не удалось загрузить курсы за прошлый день: %s", result)
+            return None
+        return result
+
+
+_hub = None
+_hub_lock = threading.Lock()
+
+
+def get_hub():
+    global _hub
+    with _hub_lock:
+        if _hub is None:
+            _hub = DataHub(load_settings()["cities"], shared=SharedSnapshot())
+        return _hub
@@ -0,0 +1,31 @@
+import atexit
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+
+_listener = None
+
+
+def setup_logging(level=logging.INFO):
+    """
+    Логи пишутся через очередь: потоки GUI и хаба только кладут запись
+    в очередь, а вывод в stdout делает отдельный поток QueueListener.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue = queue.SimpleQueue()
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(logging.Formatter(FORMAT, "%H:%M:%S"))
+
+    _listener = QueueListener(log_queue, console, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    root = logging.getLogger()
+    root.handlers[:] = [QueueHandler(log_queue)]
+    root.setLevel(level)
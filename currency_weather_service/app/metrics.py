@@ -0,0 +1,242 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.fsutil import atomic_write_json
+from app.settings import SETTINGS_FILE
+
+log = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS_HOST = "127.0.0.1"
+METRICS_DUMP_FILE = os.path.join(os.path.dirname(SETTINGS_FILE), "metrics.json")
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    body = ",".join(
+        f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for k, v in pairs
+    )
+    return "{" + body + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(_label_key(labels), 0)
+
+    def render(self):
+        with self._lock:
+            return [f"{self.name}{_format_labels(key)} {value}"
+                    for key, value in sorted(self._values.items())]
+
+    def as_list(self):
+        with self._lock:
+            return [{"labels": dict(key), "value": value}
+                    for key, value in sorted(self._values.items())]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        # ключ меток -> [счётчики по корзинам, сумма, количество]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                for bound, bucket_count in zip(self.buckets, counts):
+                    lines.append(f"{self.name}_bucket{_format_labels(key, [('le', bound)])} {bucket_count}")
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', '+Inf')])} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+    def as_list(self):
+        with self._lock:
+            return [{
+                "labels": dict(key),
+                "count": count,
+                "sum": total,
+                "buckets": dict(zip(map(str, self.buckets), counts))
+            } for key, (counts, total, count) in sorted(self._values.items())]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def render_prometheus(self):
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def as_dict(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {
+            "time": time.time(),
+            "metrics": {
+                m.name: {"type": m.kind, "help": m.help, "values": m.as_list()}
+                for m in metrics
+            }
+        }
+
+
+REGISTRY = Registry()
+
+
+def counter(name, help):
+    return REGISTRY.register(Counter(name, help))
+
+
+def histogram(name, help, buckets=DEFAULT_BUCKETS):
+    return REGISTRY.register(Histogram(name, help, buckets))
+
+
+# --- METRICS ---
+http_request_seconds = histogram(
+    "cws_http_request_seconds", "Длительность HTTP-запросов к API по эндпоинтам")
+http_errors = counter(
+    "cws_http_errors_total", "Запросы к API, завершившиеся ошибкой")
+http_retries = counter(
+    "cws_http_retries_total", "Повторные попытки HTTP-запросов")
+cache_requests = counter(
+    "cws_cache_requests_total", "Обращения к кэшам, result=hit|miss")
+refresh_seconds = histogram(
+    "cws_refresh_seconds", "Длительность цикла обновления хаба")
+refresh_errors = counter(
+    "cws_refresh_errors_total", "Ошибки загрузки источников в цикле обновления")
+provider_hedges = counter(
+    "cws_provider_hedges_total", "Страхующие запросы к запасному провайдеру или тому же хосту")
+provider_rejected = counter(
+    "cws_provider_rejected_total", "Вызовы, отклонённые открытым предохранителем")
+http_cache_requests = counter(
+    "cws_http_cache_requests_total",
+    "Запросы через кэш ответов, result=fresh|not_modified|unchanged|miss")
+http_cache_bytes = counter(
+    "cws_http_cache_bytes_total", "Байты ответов API, kind=received|saved")
+ui_update_seconds = histogram(
+    "cws_ui_update_seconds", "Время отрисовки нового снимка в окне",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1))
+
+
+# --- EXPORT ---
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            body = REGISTRY.render_prometheus().encode("utf-8")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_http_exporter(port, host=METRICS_HOST):
+    """
+    Отдаёт метрики в текстовом формате Prometheus на http://host:port/metrics.
+    """
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        # порт уже занят, например, вторым экземпляром приложения
+        log.warning("Метрики на %s:%s недоступны: %s", host, port, e)
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    log.info("Метрики: http://%s:%s/metrics", host, port)
+    return server
+
+
+def start_json_dump(path=METRICS_DUMP_FILE, interval=300):
+    """
+    Периодически сохраняет метрики в JSON-файл.
+    """
+    stopped = threading.Event()
+
+    def run():
+        while not stopped.wait(interval):
+            try:
+                atomic_write_json(path, REGISTRY.as_dict())
+            except Exception as e:
+                log.error("Ошибка записи метрик: %s", e)
+
+    threading.Thread(target=run, daemon=True).start()
+    return stopped
+
+
+def start_exporters(settings):
+    port = settings.get("metrics_port", 0)
+    if port:
+        start_http_exporter(port)
+    interval = settings.get("metrics_dump_interval", 0)
+    if interval:
+        start_json_dump(interval=interval)
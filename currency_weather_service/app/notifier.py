@@ -1,8 +1,65 @@
-from plyer import notification
-
-def notify(title, message):
-    notification.notify(
-        title=title,
-        message=message,
-        timeout=5
-    )
+import logging
+import queue
+import threading
+
+log = logging.getLogger(__name__)
+
+
+def notify(title, message):
+    # plyer импортируем только при первом уведомлении: headless-режиму он не нужен
+    from plyer import notification
+
+    notification.notify(
+        title=title,
+        message=message,
+        timeout=5
+    )
+
+
+def log_notify(title, message):
+    log.warning("%s: %s", title, message)
+
+
+class NotifyQueue:
+    """
+    Доставка уведомлений в отдельном потоке через ограниченную очередь:
+    медленный бэкенд уведомлений не задерживает цикл обновления.
+    При переполнении выбрасывается самое старое уведомление.
+    """
+    def __init__(self, notifier=notify, maxsize=8):
+        self.notifier = notifier
+        self.queue = queue.Queue(maxsize=maxsize)
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.loop, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self.submit(None)
+            self._thread = None
+
+    def submit(self, item):
+        while True:
+            try:
+                self.queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    dropped = self.queue.get_nowait()
+                    log.warning("Очередь уведомлений переполнена, пропущено: %s", dropped)
+                except queue.Empty:
+                    pass
+
+    def loop(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            title, message = item
+            try:
+                self.notifier(title, message)
+            except Exception as e:
+                log.error("Ошибка уведомления: %s", e)
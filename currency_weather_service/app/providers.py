@@ -0,0 +1,161 @@
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+
+from app import metrics
+
+log = logging.getLogger(__name__)
+
+# если за это время ответа нет, параллельно отправляется второй запрос
+HEDGE_DELAY = 1.0
+# всего попыток на один вызов: основная и одна страхующая
+MAX_ATTEMPTS = 2
+
+# предохранитель: после стольких ошибок подряд провайдер пропускается,
+# через RESET_TIMEOUT секунд пропускается один пробный запрос
+FAILURE_THRESHOLD = 3
+RESET_TIMEOUT = 30
+
+# общий пул для попыток; проигравший запрос дорабатывает в нём в фоне
+_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="provider")
+
+
+class CircuitOpen(Exception):
+    """Все провайдеры группы отключены предохранителями."""
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name, failure_threshold=FAILURE_THRESHOLD,
+                 reset_timeout=RESET_TIMEOUT, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """
+        Можно ли отправить запрос. Из открытого состояния по истечении
+        reset_timeout пропускается ровно один пробный запрос.
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                log.info("Провайдер %s: пробный запрос", self.name)
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                log.info("Провайдер %s снова доступен", self.name)
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or (
+                    self.state == self.CLOSED and self.failures >= self.failure_threshold):
+                log.warning("Провайдер %s отключён на %s с", self.name, self.reset_timeout)
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+
+
+class Provider:
+    def __init__(self, name, base_url):
+        self.name = name
+        self.base_url = base_url
+        self.breaker = CircuitBreaker(name)
+
+    def attempt(self, request):
+        try:
+            result = request(self.base_url)
+        except requests.HTTPError as e:
+            # 4xx — ошибка запроса, а не провайдера
+            if e.response is not None and e.response.status_code < 500:
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure()
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return result
+
+
+class ProviderGroup:
+    """
+    Взаимозаменяемые адреса одного API: основной и запасные (например,
+    локальная заглушка). Вызов отправляется основному; если он не ответил
+    за HEDGE_DELAY или упал, страхующий запрос уходит следующему доступному
+    провайдеру (или тому же хосту), берётся первый удачный ответ.
+    """
+    def __init__(self, name, urls):
+        self.name = name
+        self.configure(urls)
+
+    def configure(self, urls):
+        urls = [url for url in urls if url]
+        self.providers = [
+            Provider(self.name if i == 0 else f"{self.name}#{i}", url)
+            for i, url in enumerate(urls)
+        ]
+
+    def _pick(self, used):
+        # сначала ещё не использованные провайдеры, затем повтор на тот же хост
+        for provider in sorted(self.providers, key=lambda p: p in used):
+            if provider.breaker.allow():
+                return provider
+        return None
+
+    def call(self, request):
+        """
+        request(base_url) выполняет запрос к провайдеру и возвращает результат.
+        """
+        used = []
+
+        def launch():
+            provider = self._pick(used)
+            if provider is None:
+                return None
+            used.append(provider)
+            return _pool.submit(provider.attempt, request)
+
+        first = launch()
+        if first is None:
+            metrics.provider_rejected.inc(provider=self.name)
+            raise CircuitOpen(f"{self.name}: провайдеры недоступны")
+
+        pending = {first}
+        error = None
+        while pending:
+            budget = HEDGE_DELAY if len(used) < MAX_ATTEMPTS else None
+            done, pending = wait(pending, timeout=budget, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    return future.result()
+                except Exception as e:
+                    error = e
+
+            # ответа нет в пределах бюджета или попытка упала — страхуем
+            if len(used) < MAX_ATTEMPTS:
+                hedge = launch()
+                if hedge is not None:
+                    metrics.provider_hedges.inc(provider=self.name)
+                    pending.add(hedge)
+
+        raise error
@@ -0,0 +1,220 @@
+import datetime
+import logging
+import os
+import struct
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
+
+from app.api_currency import CURRENCY_IDS, get_rates_dynamics, get_rates_table
+from app.fsutil import atomic_write_bytes
+from app.settings import SETTINGS_FILE
+
+log = logging.getLogger(__name__)
+
+HISTORY_DIR = os.path.join(os.path.dirname(SETTINGS_FILE), "history")
+
+# запись фиксированной длины: день (от 1970-01-01) и курс за единицу валюты
+RECORD = struct.Struct("<id")
+
+# API динамики отдаёт не больше года за запрос
+MAX_CHUNK_DAYS = 365
+BACKFILL_DAYS = 365
+
+EPOCH = datetime.date(1970, 1, 1).toordinal()
+
+
+def to_day(date):
+    if isinstance(date, str):
+        date = datetime.date.fromisoformat(date[:10])
+    return date.toordinal() - EPOCH
+
+
+def from_day(day):
+    return datetime.date.fromordinal(day + EPOCH)
+
+
+class RateSeries:
+    """
+    Ряд курсов одной валюты: два параллельных массива, отсортированных по дню.
+    """
+    __slots__ = ("days", "values")
+
+    def __init__(self):
+        self.days = array("i")
+        self.values = array("d")
+
+
+class RateHistory:
+    """
+    Локальная история курсов: по файлу записей фиксированной длины на валюту.
+    Новые дни дописываются в конец файла, дозагрузка прошлых периодов
+    пересобирает файл целиком.
+    """
+    def __init__(self, directory=HISTORY_DIR):
+        self.directory = directory
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def _path(self, code):
+        return os.path.join(self.directory, f"{code}.bin")
+
+    def _get(self, code):
+        series = self._series.get(code)
+        if series is None:
+            series = self._load(code)
+            self._series[code] = series
+        return series
+
+    def _load(self, code):
+        records = {}
+        path = self._path(code)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                data = f.read()
+            # хвост от оборванной записи отбрасываем
+            data = data[:len(data) - len(data) % RECORD.size]
+            for day, value in RECORD.iter_unpack(data):
+                records[day] = value
+        return self._build(records)
+
+    @staticmethod
+    def _build(records):
+        series = RateSeries()
+        for day in sorted(records):
+            series.days.append(day)
+            series.values.append(records[day])
+        return series
+
+    def _rewrite(self, code, series):
+        os.makedirs(self.directory, exist_ok=True)
+        data = b"".join(RECORD.pack(day, value) for day, value in zip(series.days, series.values))
+        atomic_write_bytes(self._path(code), data, suffix=".bin")
+
+    # --- WRITE ---
+    def append(self, code, date, rate):
+        day = to_day(date)
+        with self._lock:
+            series = self._get(code)
+            if series.days and day <= series.days[-1]:
+                self._merge(code, {day: rate})
+                return
+            series.days.append(day)
+            series.values.append(rate)
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self._path(code), "ab") as f:
+                f.write(RECORD.pack(day, rate))
+
+    def record(self, rates, date):
+        """
+        Дописывает дневные курсы из снимка хаба {code: курс}.
+        """
+        if date is None:
+            return
+        for code, rate in rates.items():
+            self.append(code, date, rate)
+
+    def merge(self, code, records):
+        """
+        Вливает {date: курс} в историю валюты.
+        """
+        with self._lock:
+            self._merge(code, {to_day(d): v for d, v in records.items()})
+
+    def _merge(self, code, records):
+        series = self._get(code)
+        merged = dict(zip(series.days, series.values))
+        if all(merged.get(day) == value for day, value in records.items()):
+            return
+        merged.update(records)
+        series = self._build(merged)
+        self._series[code] = series
+        self._rewrite(code, series)
+
+    # --- READ ---
+    def range(self, code, start=None, end=None):
+        """
+        Курсы за [start, end] без обращения к сети.
+        Возвращает срезы массивов (days, values).
+        """
+        with self._lock:
+            series = self._get(code)
+            lo = bisect_left(series.days, to_day(start)) if start else 0
+            hi = bisect_right(series.days, to_day(end)) if end else len(series.days)
+            return series.days[lo:hi], series.values[lo:hi]
+
+    def last_year(self, code, today=None):
+        today = today or datetime.date.today()
+        return self.range(code, today - datetime.timedelta(days=BACKFILL_DAYS), today)
+
+    def missing_ranges(self, code, start, end):
+        """
+        Непрерывные периоды внутри [start, end], за которые нет записей.
+        """
+        days, _ = self.range(code, start, end)
+        present = set(days)
+        ranges = []
+        gap_start = None
+        for day in range(to_day(start), to_day(end) + 1):
+            if day not in present:
+                if gap_start is None:
+                    gap_start = day
+            elif gap_start is not None:
+                ranges.append((from_day(gap_start), from_day(day - 1)))
+                gap_start = None
+        if gap_start is not None:
+            ranges.append((from_day(gap_start), end))
+        return ranges
+
+    # --- BACKFILL ---
+    def backfill(self, codes=None, start=None, end=None, workers=4):
+        """
+        Докачивает пропуски из /exrates/rates/dynamics кусками не длиннее
+        года, куски загружаются параллельно.
+        """
+        codes = [code for code in (codes or CURRENCY_IDS) if code in CURRENCY_IDS]
+        end = end or datetime.date.today()
+        start = start or end - datetime.timedelta(days=BACKFILL_DAYS)
+
+        chunks = []
+        for code in codes:
+            for gap_start, gap_end in self.missing_ranges(code, start, end):
+                chunk_start = gap_start
+                while chunk_start <= gap_end:
+                    chunk_end = min(
+                        chunk_start + datetime.timedelta(days=MAX_CHUNK_DAYS - 1), gap_end
+                    )
+                    chunks.append((code, chunk_start, chunk_end))
+                    chunk_start = chunk_end + datetime.timedelta(days=1)
+        if not chunks:
+            return 0
+
+        # динамика отдаёт курс за Cur_Scale единиц, масштаб берём из текущей таблицы
+        table = get_rates_table()
+        scales = {code: table[code].get("Cur_Scale", 1) for code in codes if code in table}
+
+        def fetch(chunk):
+            code, chunk_start, chunk_end = chunk
+            rows = get_rates_dynamics(CURRENCY_IDS[code], chunk_start, chunk_end)
+            return code, rows
+
+        added = 0
+        with ThreadPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+            for code, rows in pool.map(fetch, chunks):
+                scale = scales.get(code, 1)
+                self.merge(code, {date: round(rate / scale, 6) for date, rate in rows})
+                added += len(rows)
+        return added
+
+    def backfill_async(self, codes=None):
+        def run():
+            try:
+                added = self.backfill(codes)
+                if added:
+                    log.info("История курсов: загружено %s записей", added)
+            except Exception as e:
+                log.error("История курсов: %s", e)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
@@ -0,0 +1,135 @@
+import datetime
+import math
+
+# повтор после ошибки: 1, 2, 4 ... минут, но не реже раза в 30 минут
+ERROR_RETRY = 60
+ERROR_RETRY_MAX = 1800
+
+# источники, срок которых наступает в пределах этого окна,
+# загружаются за одно пробуждение
+COALESCE_WINDOW = 120
+
+# при растянутом расписании (пользователь отошёл) срок сдвигается не дальше этого
+STRETCH_LIMIT = 3600
+
+
+def error_backoff(failures):
+    return min(ERROR_RETRY * 2 ** (failures - 1), ERROR_RETRY_MAX)
+
+
+class SourceState:
+    """
+    История загрузок одного источника, по ней политика считает следующий срок.
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.last_attempt = None
+        self.last_success = None
+        self.failures = 0
+        self.unchanged = 0
+        self.value = None
+        self.data_date = None
+
+    def record_success(self, now, value, data_date=None):
+        if self.last_success is not None and value == self.value:
+            self.unchanged += 1
+        else:
+            self.unchanged = 0
+        self.last_attempt = now
+        self.last_success = now
+        self.failures = 0
+        self.value = value
+        self.data_date = data_date
+
+    def record_failure(self, now):
+        self.last_attempt = now
+        self.failures += 1
+
+
+class WeatherPolicy:
+    """
+    Open-Meteo обновляет текущую погоду раз в 15 минут. Опрашиваем сразу
+    после очередного обновления, а если данные не меняются — реже.
+    """
+    def __init__(self, interval=900, max_interval=3600, offset=60):
+        self.interval = interval
+        self.max_interval = max_interval
+        self.offset = offset
+
+    def next_due(self, state, now):
+        if state.last_attempt is None:
+            return now
+        if state.failures:
+            return state.last_attempt + error_backoff(state.failures)
+
+        interval = min(self.interval * 2 ** state.unchanged, self.max_interval)
+        due = state.last_attempt + interval
+        # выравниваем на границу обновления модели
+        return math.ceil((due - self.offset) / self.interval) * self.interval + self.offset
+
+
+class RatesPolicy:
+    """
+    Официальные курсы НБ РБ устанавливаются раз в день. Если курсы
+    на сегодня уже загружены, следующий запрос — после смены дня.
+    Если дата в ответе отстаёт, повторяем с нарастающей паузой.
+    """
+    def __init__(self, publish_time=datetime.time(0, 5), retry=300, max_retry=3600):
+        self.publish_time = publish_time
+        self.retry = retry
+        self.max_retry = max_retry
+
+    def next_due(self, state, now):
+        if state.last_attempt is None:
+            return now
+        if state.failures:
+            return state.last_attempt + error_backoff(state.failures)
+
+        today = datetime.date.fromtimestamp(now)
+        if state.data_date is not None and state.data_date >= today.isoformat():
+            tomorrow = today + datetime.timedelta(days=1)
+            return datetime.datetime.combine(tomorrow, self.publish_time).timestamp()
+
+        return state.last_attempt + min(self.retry * 2 ** state.unchanged, self.max_retry)
+
+
+class Scheduler:
+    """
+    Расписание для нескольких источников, у каждого своя политика свежести.
+    """
+    def __init__(self, policies, coalesce=COALESCE_WINDOW):
+        self.policies = dict(policies)
+        self.states = {name: SourceState() for name in self.policies}
+        self.coalesce = coalesce
+
+    def next_due(self, name, now, stretch=1):
+        """
+        Срок следующей загрузки; при stretch > 1 интервал после удачной
+        загрузки растягивается во столько раз, но не больше чем на STRETCH_LIMIT.
+        """
+        state = self.states[name]
+        due = self.policies[name].next_due(state, now)
+        if stretch > 1 and state.last_attempt is not None and not state.failures:
+            due += min((due - state.last_attempt) * (stretch - 1), STRETCH_LIMIT)
+        return due
+
+    def due_sources(self, now, stretch=1):
+        dues = {name: self.next_due(name, now, stretch) for name in self.policies}
+        if min(dues.values()) > now:
+            return []
+        return [name for name, due in dues.items() if due <= now + self.coalesce]
+
+    def seconds_until_next(self, now, stretch=1):
+        earliest = min(self.next_due(name, now, stretch) for name in self.policies)
+        return max(earliest - now, 0)
+
+    def record_success(self, name, now, value, data_date=None):
+        self.states[name].record_success(now, value, data_date)
+
+    def record_failure(self, name, now):
+        self.states[name].record_failure(now)
+
+    def reset(self, name):
+        self.states[name].reset()
@@ -1,33 +1,144 @@
-import json
-import os
-
-DEFAULT_SETTINGS = {
-    "city": "Минск",
-    "theme": "dark",
-    "pinned": False
-}
-
-
-SETTINGS_FILE = "settings.json"
-
-
-def load_settings():
-    if not os.path.exists(SETTINGS_FILE):
-        save_settings(DEFAULT_SETTINGS)
-        return DEFAULT_SETTINGS
-
-    try:
-        with open(SETTINGS_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        # подстраховка, если ключей не хватает
-        for k, v in DEFAULT_SETTINGS.items():
-            data.setdefault(k, v)
-        return data
-    except Exception:
-        save_settings(DEFAULT_SETTINGS)
-        return DEFAULT_SETTINGS
-
-
-def save_settings(data: dict):
-    with open(SETTINGS_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=4)
+import atexit
+import copy
+import json
+import logging
+import os
+import threading
+
+from app.fsutil import atomic_write_json
+
+log = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    "city": "Минск",
+    "cities": ["Минск"],
+    "theme": "dark",
+    "pinned": False,
+    # полоса прогноза в окне: "hours" — ближайшие сутки, "days" — по дням
+    "forecast_view": "hours",
+    # кросс-курсы в окне: "база/котируемая", любые валюты таблицы НБ РБ и BYN
+    "pairs": ["EUR/USD", "USD/RUB"],
+    # метрики: Prometheus на 127.0.0.1:<порт> (0 — выключено) и JSON-дамп раз в N секунд
+    "metrics_port": 9464,
+    "metrics_dump_interval": 300,
+    # порт локального HTTP/JSON-сервера в режиме --daemon
+    "daemon_port": 8765,
+    # что показывает иконка трея: "temp" — температура, иначе код валюты
+    "tray_value": "temp"
+}
+
+
+SETTINGS_FILE = "settings.json"
+
+# частые сохранения (переключение темы, закрепление) за это время сливаются в одну запись
+SAVE_DELAY = 0.5
+
+
+def _with_defaults(data):
+    # подстраховка, если ключей не хватает
+    if "city" in data:
+        data.setdefault("cities", [data["city"]])
+    for k, v in DEFAULT_SETTINGS.items():
+        data.setdefault(k, copy.deepcopy(v))
+    return data
+
+
+class SettingsStore:
+    """
+    Настройки в памяти: файл перечитывается, только если изменилось его mtime,
+    а запись откладывается на SAVE_DELAY и выполняется в фоне атомарно.
+    """
+    def __init__(self, path=SETTINGS_FILE, delay=SAVE_DELAY):
+        self.path = path
+        self.delay = delay
+        self._data = None
+        self._stamp = None
+        self._pending = None
+        self._timer = None
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def load(self):
+        with self._lock:
+            # несохранённые изменения новее файла
+            if self._pending is not None:
+                return copy.deepcopy(self._pending)
+
+            stamp = self._file_stamp()
+            if stamp is None:
+                self._data = copy.deepcopy(DEFAULT_SETTINGS)
+                self._schedule(self._data)
+            elif stamp != self._stamp:
+                self._data = self._read(stamp)
+            return copy.deepcopy(self._data)
+
+    def _read(self, stamp):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = _with_defaults(json.load(f))
+            self._stamp = stamp
+            return data
+        except Exception as e:
+            # битый файл не перезаписываем: остаются последние прочитанные настройки
+            log.error("Ошибка чтения настроек: %s", e)
+            return self._data or copy.deepcopy(DEFAULT_SETTINGS)
+
+    def save(self, data):
+        with self._lock:
+            self._schedule(copy.deepcopy(data))
+
+    def _schedule(self, data):
+        self._pending = data
+        if self._timer is None:
+            self._timer = threading.Timer(self.delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Записывает отложенные изменения сразу (при выходе — через atexit)."""
+        # запись идёт вне основной блокировки: чтение настроек её не ждёт
+        with self._write_lock:
+            with self._lock:
+                data, self._pending = self._pending, None
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                if data is None:
+                    return
+                # load() во время записи должен видеть новые настройки, а не прежний файл
+                self._data = data
+            try:
+                atomic_write_json(self.path, data)
+            except Exception as e:
+                log.error("Ошибка записи настроек: %s", e)
+                with self._lock:
+                    # изменения не теряются: запишутся со следующим сохранением или при выходе
+                    if self._pending is None:
+                        self._pending = data
+                return
+            with self._lock:
+                self._stamp = self._file_stamp()
+
+
+_store = SettingsStore()
+atexit.register(_store.flush)
+
+
+def load_settings():
+    return _store.load()
+
+
+def save_settings(data: dict):
+    _store.save(data)
+
+
+def flush_settings():
+    """Записать отложенные изменения сейчас — например, перед просьбой к другому процессу."""
+    _store.flush()
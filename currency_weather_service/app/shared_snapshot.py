@@ -0,0 +1,312 @@
+import json
+import logging
+import mmap
+import os
+import socket
+import struct
+import threading
+
+from app.forecast import Forecast
+from app.settings import SETTINGS_FILE
+from app.snapshot_cache import SNAPSHOT_KEYS
+
+log = logging.getLogger(__name__)
+
+# файлы лежат рядом с settings.json: их видят все экземпляры приложения
+LOCK_FILE = os.path.join(os.path.dirname(SETTINGS_FILE), "instance.lock")
+SHARED_FILE = os.path.join(os.path.dirname(SETTINGS_FILE), "snapshot.shm")
+
+# --- LAYOUT ---
+# заголовок: магия, версия раскладки, активный слот, seq, pid лидера,
+# счётчик просьб ведомых обновить данные, время, когда данные последний раз
+# были на виду у ведомого, UDP-порт, которым ведомые будят лидера;
+# за ним два слота фиксированного размера
+MAGIC = b"CWSS"
+LAYOUT_VERSION = 3
+HEADER = struct.Struct("<4sHHQIIdH")
+SLOT_AT, SEQ_AT, PID_AT, REQUESTS_AT, DEMAND_AT, WAKE_AT = 6, 8, 16, 20, 24, 32
+HEADER_SIZE = 64
+SLOT_SIZE = 512 * 1024
+FILE_SIZE = HEADER_SIZE + 2 * SLOT_SIZE
+
+U16 = struct.Struct("<H")
+U32 = struct.Struct("<I")
+U64 = struct.Struct("<Q")
+F64 = struct.Struct("<d")
+
+# ведомый с данными на виду отмечается не чаще раза в DEMAND_INTERVAL секунд,
+# лидер считает отметку действующей DEMAND_TTL секунд
+DEMAND_INTERVAL = 60
+DEMAND_TTL = 150
+
+# сколько раз ведомый перечитывает заголовок, если попал на запись лидера
+READ_RETRIES = 8
+
+SHARED_KEYS = SNAPSHOT_KEYS + ("forecast", "error", "stale")
+
+
+def encode(snapshot):
+    data = {k: snapshot.get(k) for k in SHARED_KEYS}
+    return json.dumps(
+        data, ensure_ascii=False, separators=(",", ":"), default=Forecast.to_dict
+    ).encode("utf-8")
+
+
+def decode(text):
+    data = json.loads(text)
+    if data["forecast"] is not None:
+        data["forecast"] = {
+            city: Forecast.from_dict(item) if item else None
+            for city, item in data["forecast"].items()
+        }
+    return data
+
+
+class InstanceLock:
+    """
+    Эксклюзивная блокировка файла: держит её один процесс. ОС снимает
+    блокировку, когда процесс завершается, в том числе аварийно.
+    """
+    def __init__(self, path=LOCK_FILE):
+        self.path = path
+        self._file = None
+
+    @property
+    def held(self):
+        return self._file is not None
+
+    def acquire(self):
+        """Неблокирующая попытка; False — блокировку держит другой процесс."""
+        if self._file is not None:
+            return True
+        f = open(self.path, "a+b")
+        try:
+            if os.name == "nt":
+                import msvcrt
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        self._file = f
+        return True
+
+    def release(self):
+        f, self._file = self._file, None
+        if f is None:
+            return
+        try:
+            if os.name == "nt":
+                import msvcrt
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        finally:
+            f.close()
+
+
+class SharedSnapshot:
+    """
+    Снимок хаба в общей памяти (mmap файла) для нескольких процессов:
+    окна, трея, демона. Пишет только лидер — владелец InstanceLock,
+    остальные читают готовые данные без своих запросов к API.
+
+    Запись — seqlock с двумя слотами: лидер заполняет неактивный слот,
+    затем под нечётным seq переключает на него заголовок. Ведомый читает
+    активный слот и принимает данные, только если seq до и после чтения
+    совпал и чётный. Пока seq не менялся, read() не трогает данные вовсе.
+    """
+    def __init__(self, path=SHARED_FILE, lock=None):
+        self.path = path
+        self.lock = lock or InstanceLock()
+        self.seq = None
+        self.snapshot = None
+        self._requests = 0
+        self._demand_sent = None
+        self._mm = None
+        self._wake_socket = None
+        self._write_lock = threading.Lock()
+
+    @property
+    def is_leader(self):
+        return self.lock.held
+
+    def _map(self):
+        if self._mm is None:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o600)
+            try:
+                if os.fstat(fd).st_size < FILE_SIZE:
+                    os.ftruncate(fd, FILE_SIZE)
+                self._mm = mmap.mmap(fd, FILE_SIZE)
+            finally:
+                os.close(fd)
+        return self._mm
+
+    # --- LEADER ---
+    def try_lead(self, on_wake=None):
+        """
+        Стать лидером, если блокировка свободна: её нет ни у кого или
+        прежний лидер завершился. on_wake() вызывается, когда ведомый
+        просит обновить данные или его данные снова на виду, — лидеру
+        не нужно часто проверять заголовок самому.
+        """
+        if not self.lock.acquire():
+            return False
+        try:
+            mm = self._map()
+        except OSError:
+            # без общего файла лидерство бессмысленно: ведомые ждали бы зря
+            self.lock.release()
+            raise
+        magic, version, _, seq, _, requests, _, _ = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC or version != LAYOUT_VERSION:
+            HEADER.pack_into(mm, 0, MAGIC, LAYOUT_VERSION, 0, 0, 0, 0, 0.0, 0)
+            seq = requests = 0
+        elif seq & 1:
+            # прежний лидер упал посреди переключения слота
+            U64.pack_into(mm, SEQ_AT, seq + 1)
+        U32.pack_into(mm, PID_AT, os.getpid())
+        self._requests = requests
+        U16.pack_into(mm, WAKE_AT, self._listen(on_wake) if on_wake else 0)
+        return True
+
+    def _listen(self, on_wake):
+        """Порт для побудки лидера; 0 — не вышло, ведомых увидим на обычной проверке."""
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.bind(("127.0.0.1", 0))
+        except OSError as e:
+            log.warning("Побудка лидера недоступна: %s", e)
+            return 0
+        self._wake_socket = sock
+
+        def run():
+            while True:
+                try:
+                    data = sock.recv(16)
+                except OSError:
+                    return
+                # пустой ответ — сокет закрыт в release()
+                if not data or self._wake_socket is not sock:
+                    return
+                on_wake()
+
+        threading.Thread(target=run, daemon=True).start()
+        return sock.getsockname()[1]
+
+    def publish(self, snapshot):
+        payload = encode(snapshot)
+        if len(payload) > SLOT_SIZE - U32.size:
+            log.warning("Снимок (%s байт) не помещается в общую память", len(payload))
+            return False
+
+        with self._write_lock:
+            if not self.is_leader:
+                return False
+            mm = self._map()
+            slot = 1 - U16.unpack_from(mm, SLOT_AT)[0]
+            offset = HEADER_SIZE + slot * SLOT_SIZE
+            U32.pack_into(mm, offset, len(payload))
+            mm[offset + U32.size:offset + U32.size + len(payload)] = payload
+
+            seq = U64.unpack_from(mm, SEQ_AT)[0]
+            U64.pack_into(mm, SEQ_AT, seq + 1)
+            U16.pack_into(mm, SLOT_AT, slot)
+            U64.pack_into(mm, SEQ_AT, seq + 2)
+        return True
+
+    def take_requests(self):
+        """Были ли просьбы ведомых обновить данные с прошлой проверки."""
+        requests = U32.unpack_from(self._map(), REQUESTS_AT)[0]
+        changed = requests != self._requests
+        self._requests = requests
+        return changed
+
+    def has_demand(self, now):
+        """Нужны ли данные кому-то из ведомых: окно на виду, трей, демон."""
+        return now - F64.unpack_from(self._map(), DEMAND_AT)[0] < DEMAND_TTL
+
+    def release(self):
+        with self._write_lock:
+            if self.is_leader and self._mm is not None:
+                U16.pack_into(self._mm, WAKE_AT, 0)
+            self.lock.release()
+        sock, self._wake_socket = self._wake_socket, None
+        if sock is not None:
+            try:
+                # shutdown, в отличие от close, будит поток, ждущий в recv
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+
+    # --- FOLLOWER ---
+    def read(self):
+        """
+        Последний снимок лидера или None, если его ещё нет. Пока версия
+        не менялась, возвращается тот же объект.
+        """
+        mm = self._map()
+        for _ in range(READ_RETRIES):
+            magic, version, slot, seq, _, _, _, _ = HEADER.unpack_from(mm, 0)
+            if magic != MAGIC or version != LAYOUT_VERSION or seq == 0:
+                return None
+            if seq & 1:
+                continue
+            if seq == self.seq:
+                return self.snapshot
+
+            offset = HEADER_SIZE + slot * SLOT_SIZE
+            length = min(U32.unpack_from(mm, offset)[0], SLOT_SIZE - U32.size)
+            # декодируем прямо из отображения, без промежуточной копии байтов
+            with memoryview(mm) as view:
+                try:
+                    text = str(view[offset + U32.size:offset + U32.size + length], "utf-8")
+                except UnicodeDecodeError:
+                    text = None
+            if U64.unpack_from(mm, SEQ_AT)[0] != seq:
+                continue
+            try:
+                snapshot = decode(text)
+            except (TypeError, ValueError, KeyError) as e:
+                log.error("Ошибка чтения общего снимка: %s", e)
+                return self.snapshot
+            self.seq, self.snapshot = seq, snapshot
+            return snapshot
+        return self.snapshot
+
+    def signal_demand(self, now, force=False):
+        """
+        Отметка ведомого, что его данные на виду. Пишется редко: каждая
+        запись — грязная страница, которую ОС потом сбрасывает на диск.
+        """
+        first = self._demand_sent is None
+        if not force and not first and now - self._demand_sent < DEMAND_INTERVAL:
+            return
+        self._demand_sent = now
+        F64.pack_into(self._map(), DEMAND_AT, now)
+        if force or first:
+            # данные снова (или впервые) на виду — лидер загружает то, чей срок прошёл, сразу
+            self.wake_leader()
+
+    def request_refresh(self):
+        """Попросить лидера обновить данные вне расписания."""
+        mm = self._map()
+        requests = U32.unpack_from(mm, REQUESTS_AT)[0]
+        U32.pack_into(mm, REQUESTS_AT, (requests + 1) & 0xFFFFFFFF)
+        self.wake_leader()
+
+    def wake_leader(self):
+        port = U16.unpack_from(self._map(), WAKE_AT)[0]
+        if not port:
+            return
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            try:
+                sock.sendto(b"\0", ("127.0.0.1", port))
+            except OSError as e:
+                log.debug("Лидер не разбужен: %s", e)
@@ -0,0 +1,35 @@
+import json
+import logging
+import os
+
+from app.fsutil import atomic_write_json
+from app.settings import SETTINGS_FILE
+
+log = logging.getLogger(__name__)
+
+# последний удачный снимок лежит рядом с settings.json
+SNAPSHOT_FILE = os.path.join(os.path.dirname(SETTINGS_FILE), "snapshot.json")
+
+SNAPSHOT_KEYS = (
+    "cities", "weather", "weather_updated",
+    "rates", "table", "table_prev", "rates_date", "rates_updated", "updated"
+)
+
+
+def load_snapshot():
+    if not os.path.exists(SNAPSHOT_FILE):
+        return None
+    try:
+        with open(SNAPSHOT_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return {k: data.get(k) for k in SNAPSHOT_KEYS}
+    except Exception as e:
+        log.error("Ошибка чтения снимка: %s", e)
+        return None
+
+
+def save_snapshot(snapshot):
+    try:
+        atomic_write_json(SNAPSHOT_FILE, {k: snapshot.get(k) for k in SNAPSHOT_KEYS})
+    except Exception as e:
+        log.error("Ошибка записи снимка: %s", e)
@@ -0,0 +1,61 @@
+import builtins
+import sys
+import time
+from contextlib import contextmanager
+
+
+class StartupProfiler:
+    """
+    Замер запуска: длительность этапов (perf_counter) и время импорта
+    модулей, как у python -X importtime, но только для этого процесса.
+    """
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = []
+        self.imports = []
+        self._depth = 0
+        self._original_import = None
+
+    # --- IMPORTS ---
+    def install(self):
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._import
+
+    def uninstall(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # уже загруженные и относительные импорты не интересны
+        if level or name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            self._depth -= 1
+            self.imports.append((name, time.perf_counter() - start, self._depth))
+
+    # --- PHASES ---
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def report(self, top=15):
+        total = time.perf_counter() - self.started
+        lines = [f"Запуск: {total * 1000:.1f} мс", "", "Этапы:"]
+        for name, seconds in self.phases:
+            lines.append(f"  {seconds * 1000:8.1f} мс  {name}")
+
+        lines += ["", f"Самые долгие импорты (включая вложенные, топ-{top}):"]
+        slowest = sorted(self.imports, key=lambda item: item[1], reverse=True)[:top]
+        for name, seconds, depth in slowest:
+            lines.append(f"  {seconds * 1000:8.1f} мс  {'  ' * depth}{name}")
+        return "\n".join(lines)
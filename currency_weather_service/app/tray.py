@@ -1,27 +1,99 @@
-import pystray
-from PIL import Image, ImageDraw
-from app.worker import BackgroundWorker
-
-def create_icon():
-    img = Image.new("RGB", (64, 64), "blue")
-    d = ImageDraw.Draw(img)
-    d.text((20, 20), "$", fill="white")
-    return img
-
-def run_tray():
-    worker = BackgroundWorker()
-    worker.start()
-
-    def on_quit(icon, item):
-        worker.running = False
-        icon.stop()
-
-    icon = pystray.Icon(
-        "CurrencyWeather",
-        create_icon(),
-        menu=pystray.Menu(
-            pystray.MenuItem("Выход", on_quit)
-        )
-    )
-
-    icon.run()
+import threading
+
+from app.worker import BackgroundWorker
+from app.api_weather import warm_city_coordinates
+from app.settings import load_settings, save_settings
+
+# pystray и Pillow импортируются внутри функций: они нужны только режиму трея
+
+VALUE_TITLES = {"temp": "Температура"}
+
+
+def create_icon():
+    from PIL import Image, ImageDraw
+
+    img = Image.new("RGB", (64, 64), "blue")
+    d = ImageDraw.Draw(img)
+    d.text((20, 20), "$", fill="white")
+    return img
+
+
+class TrayFace:
+    """
+    Живая иконка трея: температура или курс выбранной валюты со стрелкой.
+    Картинка меняется, только когда меняется то, что на ней написано.
+    """
+    def __init__(self, icon, renderer):
+        self.icon = icon
+        self.renderer = renderer
+        self.snapshot = None
+        self.shown = None
+        self._lock = threading.Lock()
+
+    def on_update(self, snapshot):
+        self.snapshot = snapshot
+        self.redraw()
+
+    def redraw(self):
+        from app.tray_icon import tray_face
+
+        snapshot = self.snapshot
+        if snapshot is None:
+            return
+        settings = load_settings()
+        top, bottom, tooltip = tray_face(snapshot, settings["tray_value"])
+        face = (top, bottom, settings["theme"])
+        with self._lock:
+            if face == self.shown:
+                return
+            self.shown = face
+            self.icon.icon = self.renderer.render(*face)
+            self.icon.title = tooltip
+
+
+def create_tray():
+    import pystray
+    from app.tray_icon import IconRenderer, TRAY_VALUES
+
+    warm_city_coordinates(load_settings()["cities"])
+    worker = BackgroundWorker()
+
+    def on_quit(icon, item):
+        worker.hub.unsubscribe(face.on_update)
+        worker.stop()
+        icon.stop()
+
+    def choose(value):
+        def action(icon, item):
+            settings = load_settings()
+            settings["tray_value"] = value
+            save_settings(settings)
+            face.redraw()
+        return action
+
+    def chosen(value):
+        return lambda item: load_settings()["tray_value"] == value
+
+    icon = pystray.Icon(
+        "CurrencyWeather",
+        create_icon(),
+        menu=pystray.Menu(
+            *(
+                pystray.MenuItem(VALUE_TITLES.get(value, value), choose(value),
+                                 checked=chosen(value), radio=True)
+                for value in TRAY_VALUES
+            ),
+            pystray.Menu.SEPARATOR,
+            pystray.MenuItem("Выход", on_quit)
+        )
+    )
+    face = TrayFace(icon, IconRenderer())
+    # подписка до старта хаба: первый снимок (в том числе из кэша) сразу на иконке
+    worker.hub.subscribe(face.on_update)
+    worker.start()
+    return icon, worker
+
+
+def run_tray():
+    icon, _ = create_tray()
+    icon.run()
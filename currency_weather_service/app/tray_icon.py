@@ -0,0 +1,176 @@
+import math
+import threading
+from collections import OrderedDict
+
+from PIL import Image, ImageDraw, ImageFont
+
+from app.api_currency import RATE_CODES
+
+ICON_SIZE = 64
+# крупная строка — значение, мелкая — код валюты и стрелка
+BIG_FONT = 30
+SMALL_FONT = 17
+
+# шрифты пробуются по порядку, последний вариант — встроенный шрифт Pillow
+FONT_CANDIDATES = ("segoeuib.ttf", "arialbd.ttf", "DejaVuSans-Bold.ttf", "Arial Bold.ttf")
+
+# фон и текст как у окна (ui_window._theme_style), стрелки как в view_model
+THEME_COLORS = {
+    "dark": ((30, 30, 30, 255), (255, 255, 255, 255)),
+    "light": ((255, 255, 255, 255), (34, 34, 34, 255)),
+}
+UP_COLOR = (76, 175, 80, 255)
+DOWN_COLOR = (244, 67, 54, 255)
+UP, DOWN = "▲", "▼"
+
+# что умеют атласы; стрелки рисуются многоугольником, их нет в части шрифтов
+GLYPHS = "0123456789-+.,°" + "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+# сколько готовых иконок держать: значение меняется редко, тема — ещё реже
+RENDER_CACHE_SIZE = 64
+
+TRAY_VALUES = ("temp",) + RATE_CODES
+
+
+def load_font(size):
+    for name in FONT_CANDIDATES:
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    return ImageFont.load_default(size=size)
+
+
+class GlyphAtlas:
+    """
+    Маски символов одного размера, растеризованные один раз: строка
+    собирается вставкой готовых масок, без обращения к FreeType.
+    """
+    def __init__(self, font, chars=GLYPHS):
+        top, bottom = font.getbbox(chars)[1::2]
+        self.height = bottom - top
+        self.glyphs = {}
+        for ch in chars:
+            width = math.ceil(font.getlength(ch))
+            mask = Image.new("L", (max(width, 1), self.height))
+            ImageDraw.Draw(mask).text((0, -top), ch, font=font, fill=255)
+            self.glyphs[ch] = mask
+
+        # стрелка — равнобедренный треугольник на высоту цифр
+        side = self.height * 2 // 3
+        pad = (self.height - side) // 2
+        for ch, points in (
+            (UP, [(0, pad + side), (side, pad + side), (side / 2, pad)]),
+            (DOWN, [(0, pad), (side, pad), (side / 2, pad + side)]),
+        ):
+            mask = Image.new("L", (side + 2, self.height))
+            ImageDraw.Draw(mask).polygon(points, fill=255)
+            self.glyphs[ch] = mask
+
+    def width(self, text):
+        return sum(self.glyphs[ch].width for ch in text if ch in self.glyphs)
+
+    def draw(self, image, text, x, y, fill, colors=None):
+        for ch in text:
+            mask = self.glyphs.get(ch)
+            if mask is None:
+                continue
+            image.paste((colors or {}).get(ch, fill), (x, y, x + mask.width, y + mask.height), mask)
+            x += mask.width
+
+
+class IconRenderer:
+    """
+    Иконка трея из одной-двух строк текста. Готовые картинки кэшируются
+    по тексту и теме: повторная отрисовка того же значения — поиск в словаре.
+    """
+    def __init__(self, cache_size=RENDER_CACHE_SIZE):
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._atlases = None
+        self._backgrounds = {}
+        self._lock = threading.Lock()
+
+    def atlases(self):
+        if self._atlases is None:
+            self._atlases = (GlyphAtlas(load_font(BIG_FONT)), GlyphAtlas(load_font(SMALL_FONT)))
+        return self._atlases
+
+    def background(self, theme):
+        image = self._backgrounds.get(theme)
+        if image is None:
+            image = Image.new("RGBA", (ICON_SIZE, ICON_SIZE))
+            ImageDraw.Draw(image).rounded_rectangle(
+                (0, 0, ICON_SIZE - 1, ICON_SIZE - 1), radius=12, fill=THEME_COLORS[theme][0]
+            )
+            self._backgrounds[theme] = image
+        return image
+
+    def render(self, top, bottom="", theme="dark"):
+        theme = theme if theme in THEME_COLORS else "dark"
+        key = (top, bottom, theme)
+        with self._lock:
+            image = self._cache.get(key)
+            if image is not None:
+                self._cache.move_to_end(key)
+                return image
+
+            image = self._compose(top, bottom, theme)
+            self._cache[key] = image
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return image
+
+    def _compose(self, top, bottom, theme):
+        big, small = self.atlases()
+        fg = THEME_COLORS[theme][1]
+        image = self.background(theme).copy()
+
+        # не влезает крупным — пишем мелким
+        atlas = big if big.width(top) <= ICON_SIZE - 4 else small
+        height = atlas.height + (small.height + 2 if bottom else 0)
+        y = (ICON_SIZE - height) // 2
+        atlas.draw(image, top, (ICON_SIZE - atlas.width(top)) // 2, y, fg)
+        if bottom:
+            small.draw(image, bottom, (ICON_SIZE - small.width(bottom)) // 2,
+                       y + atlas.height + 2, fg, {UP: UP_COLOR, DOWN: DOWN_COLOR})
+        return image
+
+
+# --- FACE ---
+def format_rate(rate):
+    """
+    Курс для иконки: дешёвые валюты — за 10, 100, 1000 единиц, как их
+    котирует НБ РБ. Возвращает (текст, единиц).
+    """
+    scale = 1
+    while rate * scale < 1 and scale < 10 ** 6:
+        scale *= 10
+    value = rate * scale
+    text = f"{value:.0f}" if value >= 100 else f"{value:.1f}" if value >= 10 else f"{value:.2f}"
+    return text, scale
+
+
+def tray_face(snapshot, value="temp"):
+    """
+    Что показать в трее: (крупная строка, мелкая строка, подсказка).
+    value — "temp" (погода в первом городе) или код валюты таблицы НБ РБ.
+    """
+    city = snapshot["cities"][0]
+    current = (snapshot["weather"] or {}).get(city)
+    weather = f"{city}: {current['temp']}°C" if current else f"{city}: ..."
+
+    if value == "temp":
+        top = f"{round(current['temp']):d}°" if current else "..."
+        return top, "", weather
+
+    table = snapshot.get("table") or snapshot.get("rates") or {}
+    rate = table.get(value)
+    if rate is None:
+        return "...", value, weather
+
+    text, scale = format_rate(rate)
+    previous = (snapshot.get("table_prev") or {}).get(value)
+    arrow = UP if previous and rate > previous else DOWN if previous and rate < previous else ""
+    unit = f"{scale} {value}" if scale > 1 else value
+    return text, value + arrow, f"{weather}\n{unit}: {rate * scale:.4f} BYN"
@@ -0,0 +1,181 @@
+import datetime
+import time
+
+from app.api_currency import RATE_CODES
+from app.cross_rates import CrossRates
+
+# --- WEATHER ICONS ---
+WEATHER_ICONS = {
+    0: "☀️",
+    1: "🌤",
+    2: "⛅",
+    3: "☁️",
+    45: "🌫",
+    48: "🌫",
+    51: "🌦",
+    61: "🌧",
+    71: "❄️",
+    80: "🌧",
+    95: "⛈"
+}
+
+# сколько ячеек в полосе прогноза
+FORECAST_SLOTS = 6
+WEEKDAYS = ("Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс")
+
+UP = "<span style='color:#4caf50;'>▲{}</span>"
+DOWN = "<span style='color:#f44336;'>▼{}</span>"
+
+
+def format_age(seconds):
+    minutes = int(seconds // 60)
+    if minutes < 1:
+        return "только что"
+    if minutes < 60:
+        return f"{minutes} мин назад"
+    if minutes < 24 * 60:
+        return f"{minutes // 60} ч назад"
+    return f"{minutes // (24 * 60)} дн назад"
+
+
+class ViewModel:
+    """
+    Тексты элементов окна для снимка хаба. update() возвращает только
+    изменившиеся поля, а разделы пересчитываются, лишь когда в снимке
+    сменился соответствующий объект — окно трогает только то, что поменялось.
+    """
+    # раздел → ключ снимка, от которого он зависит
+    SECTIONS = (
+        ("weather", "weather"),
+        ("forecast", "forecast"),
+        ("rates", "rates"),
+        ("pairs", "table"),
+    )
+
+    def __init__(self, cities, pairs, forecast_view="hours"):
+        self.fields = {}
+        self.snapshot = None
+        self.last_rates = None
+        self._sources = {}
+        self.configure(cities, pairs, forecast_view)
+
+    def configure(self, cities=None, pairs=None, forecast_view=None):
+        """Смена настроек: затронутые разделы пересчитаются при следующем update()."""
+        if cities is not None:
+            self.cities = list(cities)
+            self.city = self.cities[0]
+            self._invalidate("weather", "forecast")
+        if pairs is not None:
+            self.pairs = list(pairs)
+            self._invalidate("pairs")
+        if forecast_view is not None:
+            self.forecast_view = forecast_view
+            self._invalidate("forecast")
+
+    def _invalidate(self, *sections):
+        for section in sections:
+            self._sources.pop(section, None)
+
+    def update(self, snapshot, now=None):
+        now = time.time() if now is None else now
+        self.snapshot = snapshot
+        fields = dict(self.fields)
+
+        for section, key in self.SECTIONS:
+            source = snapshot[key]
+            if source and self._sources.get(section) is not source:
+                self._sources[section] = source
+                fields.update(getattr(self, f"_{section}")(snapshot, now))
+
+        if snapshot["weather"] is None and snapshot["error"]:
+            fields["weather"] = "Ошибка обновления"
+
+        if snapshot["updated"] is not None:
+            updated = datetime.datetime.fromtimestamp(snapshot["updated"]).strftime("%H:%M")
+            text = f"Обновлено: {updated}"
+            # данные из кэша: показываем, насколько они старые
+            if snapshot["stale"]:
+                text += f" ({format_age(now - snapshot['updated'])})"
+            fields["updated"] = text
+
+        changed = {k: v for k, v in fields.items() if self.fields.get(k) != v}
+        self.fields = fields
+        return changed
+
+    def refresh(self):
+        """Пересчёт по последнему снимку — без запросов к API."""
+        return self.update(self.snapshot) if self.snapshot is not None else {}
+
+    # --- SECTIONS ---
+    def _weather(self, snapshot, now):
+        weather = snapshot["weather"]
+        current = weather.get(self.city)
+        if self.city not in weather:
+            # снимок по старому списку городов, данные ещё грузятся
+            main = f"{self.city}: ...°C"
+        elif current is None:
+            main = f"{self.city}: город не найден"
+        else:
+            icon = WEATHER_ICONS.get(current.get("code", 0), "🌡")
+            main = f"{icon}  {self.city}: {current['temp']}°C"
+
+        others = []
+        for city in self.cities[1:]:
+            data = weather.get(city)
+            if city not in weather:
+                others.append(f"{city}: ...")
+            else:
+                others.append(f"{city}: {data['temp']}°C" if data else f"{city}: —")
+        return {"weather": main, "cities": "  ·  ".join(others)}
+
+    def _forecast(self, snapshot, now):
+        forecast = snapshot["forecast"].get(self.city)
+        cells = []
+        if forecast is not None and self.forecast_view == "hours":
+            for ts, temp, code in forecast.hours(now, buckets=FORECAST_SLOTS):
+                hour = datetime.datetime.fromtimestamp(ts).strftime("%H:%M")
+                cells.append(f"{hour}\n{WEATHER_ICONS.get(code, '🌡')} {temp:.0f}°")
+        elif forecast is not None:
+            today = datetime.date.fromtimestamp(now)
+            for day, low, high, code in forecast.days(today, FORECAST_SLOTS):
+                cells.append(f"{WEEKDAYS[day.weekday()]}\n{WEATHER_ICONS.get(code, '🌡')} "
+                             f"{low:.0f}…{high:.0f}°")
+        return {
+            f"forecast{i}": cells[i] if i < len(cells) else ""
+            for i in range(FORECAST_SLOTS)
+        }
+
+    def _rates(self, snapshot, now):
+        rates = snapshot["rates"]
+        previous = self.last_rates or rates
+        self.last_rates = rates
+
+        fields = {}
+        for code in RATE_CODES:
+            new, old = rates.get(code), previous.get(code)
+            text = f"{code}: {new}"
+            if new is not None and old is not None and new > old:
+                text += " " + UP.format("")
+            elif new is not None and old is not None and new < old:
+                text += " " + DOWN.format("")
+            fields[code] = text
+        return fields
+
+    def _pairs(self, snapshot, now):
+        cross = CrossRates(snapshot["table"], snapshot["table_prev"])
+
+        parts = []
+        for base, quote in self.pairs:
+            if base not in cross or quote not in cross:
+                parts.append(f"{base}/{quote}: —")
+                continue
+            text = f"{base}/{quote}: {cross.rate(base, quote):.4f}"
+            # изменение к прошлому дню
+            change = cross.change(base, quote)
+            pct = round(change[1], 2) if change is not None else 0
+            if pct > 0:
+                text += " " + UP.format(f"{pct:.2f}%")
+            elif pct < 0:
+                text += " " + DOWN.format(f"{-pct:.2f}%")
+            parts.append(text)
+        return {"pairs": "  ·  ".join(parts)}
@@ -1,39 +1,67 @@
-import time
-import threading
-from app.api_currency import get_rates
-from app.api_weather import get_weather
-from app.notifier import notify
-
-class BackgroundWorker:
-    def __init__(self, interval=600, threshold=0.05):
-        self.interval = interval
-        self.threshold = threshold
-        self.last_rates = None
-        self.running = True
-
-    def start(self):
-        thread = threading.Thread(target=self.loop, daemon=True)
-        thread.start()
-
-    def loop(self):
-        while self.running:
-            try:
-                weather = get_weather()
-                rates = get_rates()
-
-                print(f"[INFO] Погода: {weather['temp']}°C, Курсы: {rates}")
-
-                if self.last_rates:
-                    for code in rates:
-                        if abs(rates[code] - self.last_rates[code]) >= self.threshold:
-                            notify(
-                                f"Изменение курса {code}",
-                                f"Новый курс: {rates[code]}"
-                            )
-
-                self.last_rates = rates
-
-            except Exception as e:
-                print("[ERROR]", e)
-
-            time.sleep(self.interval)
+import logging
+import time
+
+from app.activity import ACTIVE
+from app.alerts import AlertEngine, digest
+from app.hub import get_hub
+from app.notifier import NotifyQueue, notify
+from app.settings import load_settings
+
+log = logging.getLogger(__name__)
+
+
+class BackgroundWorker:
+    """
+    Подписчик общего хаба: уведомляет об изменении курсов.
+    Сам API не опрашивает — расписанием владеет DataHub.
+    """
+    def __init__(self, hub=None, engine=None, notifier=notify):
+        self.hub = hub or get_hub()
+        self.engine = engine or AlertEngine.from_settings(load_settings())
+        # уведомления уходят в свой поток, цикл хаба их не ждёт
+        self.notifications = NotifyQueue(notifier)
+        self.last_rates = None
+        self.running = False
+
+    def start(self):
+        self.running = True
+        self.notifications.start()
+        # курсы в трее и уведомления нужны всё время работы
+        self.hub.set_activity(self, ACTIVE)
+        self.hub.subscribe(self.on_update)
+        self.hub.start()
+
+    def stop(self):
+        self.running = False
+        self.hub.remove_activity(self)
+        self.hub.unsubscribe(self.on_update)
+        self.hub.stop()
+        self.notifications.stop()
+
+    def on_update(self, snapshot):
+        weather = snapshot["weather"]
+        rates = snapshot["rates"]
+        if not self.running or rates is None or rates is self.last_rates:
+            return
+
+        current = (weather or {}).get(snapshot["cities"][0])
+        temp = current["temp"] if current else "..."
+        log.info("Погода: %s°C, Курсы: %s", temp, rates)
+
+        alerts = self.engine.evaluate(self.tracked(snapshot), time.time())
+        if alerts:
+            self.notifications.submit(digest(alerts))
+
+        self.last_rates = rates
+
+    def tracked(self, snapshot):
+        """
+        Отслеживаемые курсы: основные валюты и те, для которых в настройках
+        есть отдельное правило.
+        """
+        rates = dict(snapshot["rates"])
+        table = snapshot.get("table") or {}
+        for code in self.engine.rules:
+            if code in table:
+                rates[code] = table[code]
+        return rates
@@ -0,0 +1,218 @@
+"""
+Замеры обновления данных без сети: поднимает локальную заглушку API
+(bench/stub_server.py), направляет на неё клиент через CWS_*_URL
+и считает p50/p95/p99 для каждой операции.
+
+    python bench/run_bench.py                          # замер, результат в bench/results.json
+    python bench/run_bench.py --save-baseline          # сохранить как bench/baseline.json (или --baseline PATH)
+    python bench/run_bench.py --compare                # сравнить с baseline, код 1 при регрессии
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench.stub_server import Faults, StubServer  # noqa: E402
+
+BENCH_DIR = os.path.join(ROOT, "bench")
+RESULTS_FILE = os.path.join(BENCH_DIR, "results.json")
+BASELINE_FILE = os.path.join(BENCH_DIR, "baseline.json")
+
+# зависание заглушки должно быть дольше таймаута чтения клиента
+READ_TIMEOUT = 0.5
+# бюджет до страхующего запроса — в масштабе укороченного таймаута
+HEDGE_DELAY = 0.15
+
+SCENARIOS = {
+    "clean": dict(latency=0.02, jitter=0.005),
+    "degraded": dict(latency=0.05, jitter=0.04, error_rate=0.05,
+                     timeout_rate=0.01, hang=READ_TIMEOUT * 2),
+    "degraded_alt": dict(latency=0.05, jitter=0.04, error_rate=0.05,
+                         timeout_rate=0.01, hang=READ_TIMEOUT * 2),
+}
+
+# сценарии с запасным провайдером: вторая, исправная заглушка
+ALTERNATES = {
+    "degraded_alt": dict(latency=0.02, jitter=0.005),
+}
+
+# допустимое ухудшение p95 относительно baseline
+REGRESSION_TOLERANCE = 1.25
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    if len(ordered) < 2:
+        value = ordered[0] if ordered else 0.0
+        return value, value, value
+    q = statistics.quantiles(ordered, n=100, method="inclusive")
+    return q[49], q[94], q[98]
+
+
+def measure(fn, iterations):
+    samples = []
+    errors = 0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t = time.perf_counter()
+        try:
+            fn()
+        except Exception:
+            errors += 1
+        samples.append(time.perf_counter() - t)
+    total = time.perf_counter() - started
+
+    p50, p95, p99 = percentiles(samples)
+    return {
+        "n": iterations,
+        "errors": errors,
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+        "p50_ms": round(p50 * 1000, 3),
+        "p95_ms": round(p95 * 1000, 3),
+        "p99_ms": round(p99 * 1000, 3),
+        "ops_per_s": round(iterations / total, 2),
+    }
+
+
+def run_scenario(name, faults, iterations):
+    server = StubServer(faults=Faults(seed=42, **faults))
+    base_url = server.start()
+    alt_server = None
+    urls = [base_url]
+    if name in ALTERNATES:
+        alt_server = StubServer(faults=Faults(seed=7, **ALTERNATES[name]))
+        urls.append(alt_server.start())
+    # клиент читает адреса при импорте, поэтому выставляем их до импорта app.*
+    os.environ["CWS_NBRB_URL"] = base_url
+    os.environ["CWS_GEOCODING_URL"] = base_url
+    os.environ["CWS_FORECAST_URL"] = base_url
+
+    from app import api_currency, api_weather, http_client, providers
+    api_currency.NBRB.configure(urls)
+    api_weather.GEOCODING.configure(urls)
+    api_weather.FORECAST.configure(urls)
+    http_client.READ_TIMEOUT = READ_TIMEOUT
+    providers.HEDGE_DELAY = HEDGE_DELAY
+
+    from app.hub import DataHub
+    from app.rate_history import RateHistory
+    from app.worker import BackgroundWorker
+
+    history_dir = tempfile.mkdtemp(prefix="history-")
+    cities = ["Минск"]
+
+    update_hub = DataHub(cities, history=RateHistory(history_dir))
+
+    worker_hub = DataHub(cities, history=RateHistory(history_dir))
+    worker = BackgroundWorker(hub=worker_hub, notifier=lambda title, message: None)
+    worker.running = True
+    worker_hub.subscribe(worker.on_update)
+
+    ops = {
+        "get_rates": api_currency.get_rates,
+        "get_weather": lambda: api_weather.get_weather(cities[0]),
+        "update_data": update_hub.refresh,
+        "worker_loop": worker_hub.refresh,
+    }
+
+    results = {}
+    try:
+        for op_name, fn in ops.items():
+            # первый вызов прогревает кэш геокодинга и пул соединений
+            try:
+                fn()
+            except Exception:
+                pass
+            results[op_name] = measure(fn, iterations)
+            print(f"  {name:9} {op_name:12} p50={results[op_name]['p50_ms']:8.2f} мс  "
+                  f"p95={results[op_name]['p95_ms']:8.2f} мс  p99={results[op_name]['p99_ms']:8.2f} мс  "
+                  f"ошибок={results[op_name]['errors']}")
+    finally:
+        server.stop()
+        if alt_server is not None:
+            alt_server.stop()
+
+    results["upstream_requests"] = server.requests
+    results["upstream_bytes"] = server.bytes_sent
+    if alt_server is not None:
+        results["alternate_requests"] = alt_server.requests
+        results["alternate_bytes"] = alt_server.bytes_sent
+    hosts = [url.split("//", 1)[1] for url in urls]
+    results["http_cache"] = {
+        provider: cache for provider, cache in http_client.get_cache_stats().items()
+        if provider in hosts
+    }
+    for provider, cache in results["http_cache"].items():
+        print(f"  {name:9} кэш {provider}: попаданий {cache['hit_ratio']:.0%}, "
+              f"сэкономлено {cache['bytes_saved_ratio']:.0%} трафика")
+    return results
+
+
+def compare(results, baseline):
+    regressions = []
+    for scenario, ops in baseline["results"].items():
+        for op_name, base in ops.items():
+            current = results["results"].get(scenario, {}).get(op_name)
+            # рядом с операциями лежат счётчики заглушки и статистика кэша — их не сравниваем
+            if not isinstance(base, dict) or not isinstance(current, dict) or "p95_ms" not in base:
+                continue
+            if current["p95_ms"] > base["p95_ms"] * REGRESSION_TOLERANCE:
+                regressions.append(
+                    f"{scenario}/{op_name}: p95 {base['p95_ms']} -> {current['p95_ms']} мс"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Офлайн-замеры обновления данных")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), action="append")
+    parser.add_argument("--output", default=RESULTS_FILE)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    args = parser.parse_args()
+    # пути из командной строки — относительно каталога запуска, до смены каталога
+    args.output = os.path.abspath(args.output)
+    args.baseline = os.path.abspath(args.baseline)
+
+    # кэши и снимки приложения пишутся в текущий каталог — уводим их во временный
+    os.chdir(tempfile.mkdtemp(prefix="cws-bench-"))
+
+    results = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+        },
+        "results": {},
+    }
+    for name in args.scenario or SCENARIOS:
+        results["results"][name] = run_scenario(name, SCENARIOS[name], args.iterations)
+
+    output = args.baseline if args.save_baseline else args.output
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=4)
+    print("Результаты:", output)
+
+    if args.compare:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline)
+        for line in regressions:
+            print("РЕГРЕССИЯ:", line)
+        if regressions:
+            sys.exit(1)
+        print("Регрессий нет")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""
+Локальная заглушка API НБ РБ и Open-Meteo для замеров без сети.
+
+Отдаёт записанные ответы из bench/payloads с настраиваемой задержкой,
+разбросом, ошибками 503 и зависаниями дольше таймаута клиента.
+Ответы помечаются ETag и Cache-Control: no-cache, на If-None-Match
+с тем же ETag приходит 304 без тела.
+
+    python bench/stub_server.py --port 8080 --latency 0.05
+    CWS_NBRB_URL=http://127.0.0.1:8080 CWS_GEOCODING_URL=http://127.0.0.1:8080 \\
+    CWS_FORECAST_URL=http://127.0.0.1:8080 python main.py
+"""
+import argparse
+import copy
+import datetime
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+PAYLOADS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "payloads")
+
+# коды погоды для рядов прогноза: ясно, облачно, пасмурно, дождь, снег
+FORECAST_CODES = (0, 2, 3, 61, 3, 71)
+
+
+def load_payload(name):
+    with open(os.path.join(PAYLOADS_DIR, name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class Faults:
+    """
+    Что подмешивать в ответы: задержка и разброс в секундах,
+    доли ответов с ошибкой и с зависанием на hang секунд.
+    """
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0,
+                 timeout_rate=0.0, hang=10.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.hang = hang
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def roll(self):
+        with self._lock:
+            delay = max(self.latency + self.random.uniform(-self.jitter, self.jitter), 0)
+            hang = self.random.random() < self.timeout_rate
+            error = self.random.random() < self.error_rate
+        return delay, hang, error
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # без этого заголовки и тело уходят разными пакетами и Nagle добавляет ~40 мс
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, data, status=200):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if status == 200 and self.server.validators and self.headers.get("If-None-Match") == etag:
+            status, body = 304, b""
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if status in (200, 304) and self.server.validators:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.count_bytes(len(body))
+
+    def do_GET(self):
+        server = self.server
+        server.count_request()
+
+        delay, hang, error = server.faults.roll()
+        time.sleep(server.faults.hang if hang else delay)
+        if error:
+            self.send_json({"error": "stub failure"}, status=503)
+            return
+
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        parts = [p for p in url.path.split("/") if p]
+
+        if parts[:2] == ["exrates", "rates"]:
+            self.handle_rates(parts[2:], query)
+        elif parts == ["v1", "search"]:
+            self.send_json(server.geocoding(query))
+        elif parts == ["v1", "forecast"]:
+            self.send_json(server.forecast(query))
+        else:
+            self.send_json({"error": "not found"}, status=404)
+
+    def handle_rates(self, rest, query):
+        server = self.server
+        if not rest:
+            ondate = query.get("ondate")
+            day = datetime.date.fromisoformat(ondate[:10]) if ondate else None
+            self.send_json(server.rates_table(day))
+        elif rest[0] == "dynamics" and len(rest) == 2:
+            self.send_json(server.dynamics(int(rest[1]), query))
+        else:
+            row = server.rate_by_id(int(rest[0]))
+            if row is None:
+                self.send_json({"error": "not found"}, status=404)
+            else:
+                self.send_json(row)
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, faults=None, validators=True):
+        super().__init__((host, port), StubHandler)
+        self.faults = faults or Faults()
+        self.validators = validators
+        self.requests = 0
+        # байты тел ответов — во сколько обходится трафик клиенту
+        self.bytes_sent = 0
+        self._count_lock = threading.Lock()
+        self._thread = None
+
+        self.table = load_payload("nbrb_rates.json")
+        self.geocoding_payload = load_payload("geocoding.json")
+        self.forecast_payload = load_payload("forecast.json")
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def handle_error(self, request, client_address):
+        # клиент закрыл соединение по таймауту, пока заглушка "висела"
+        pass
+
+    def count_request(self):
+        with self._count_lock:
+            self.requests += 1
+
+    def count_bytes(self, size):
+        with self._count_lock:
+            self.bytes_sent += size
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    # --- NBRB ---
+    @staticmethod
+    def wave(day):
+        # плавные колебания вокруг записанного курса
+        return 1 + 0.03 * math.sin(day.toordinal() / 29)
+
+    def rates_table(self, day=None):
+        day = day or datetime.date.today()
+        wave = self.wave(day)
+        return [
+            dict(
+                row,
+                Date=day.isoformat() + "T00:00:00",
+                Cur_OfficialRate=round(row["Cur_OfficialRate"] * wave, 4)
+            )
+            for row in self.table
+        ]
+
+    def rate_by_id(self, cid, day=None):
+        for row in self.rates_table(day):
+            if row["Cur_ID"] == cid:
+                return row
+        return None
+
+    def dynamics(self, cid, query):
+        start = datetime.date.fromisoformat(query["startdate"][:10])
+        end = datetime.date.fromisoformat(query["enddate"][:10])
+        result = []
+        day = start
+        while day <= end:
+            row = self.rate_by_id(cid, day)
+            if row is None:
+                return []
+            result.append({
+                "Cur_ID": cid,
+                "Date": row["Date"],
+                "Cur_OfficialRate": row["Cur_OfficialRate"]
+            })
+            day += datetime.timedelta(days=1)
+        return result
+
+    # --- OPEN-METEO ---
+    def geocoding(self, query):
+        payload = copy.deepcopy(self.geocoding_payload)
+        payload["results"][0]["name"] = query.get("name", "")
+        return payload
+
+    def forecast(self, query):
+        lats = query.get("latitude", "0").split(",")
+        lons = query.get("longitude", "0").split(",")
+        items = []
+        for lat, lon in zip(lats, lons):
+            item = copy.deepcopy(self.forecast_payload)
+            item["latitude"] = float(lat)
+            item["longitude"] = float(lon)
+            item["current_weather"]["temperature"] = round(float(lat) % 30 - 5, 1)
+            days = int(query.get("forecast_days", 7))
+            if "hourly" in query:
+                item["hourly"] = self.hourly(float(lat), days)
+            if "daily" in query:
+                item["daily"] = self.daily(float(lat), days)
+            items.append(item)
+        return items if len(items) > 1 else items[0]
+
+    def hourly(self, lat, days):
+        start = datetime.datetime.combine(datetime.date.today(), datetime.time())
+        base = lat % 30 - 5
+        series = {"time": [], "temperature_2m": [], "weathercode": []}
+        for h in range(days * 24):
+            t = start + datetime.timedelta(hours=h)
+            series["time"].append(t.strftime("%Y-%m-%dT%H:%M"))
+            # суточный ход: минимум к утру, максимум после обеда
+            series["temperature_2m"].append(
+                round(base + 4 * math.sin(2 * math.pi * (h % 24 - 9) / 24), 1))
+            series["weathercode"].append(FORECAST_CODES[(h // 6) % len(FORECAST_CODES)])
+        return series
+
+    def daily(self, lat, days):
+        base = lat % 30 - 5
+        series = {"time": [], "weathercode": [], "temperature_2m_max": [], "temperature_2m_min": []}
+        for d in range(days):
+            day = datetime.date.today() + datetime.timedelta(days=d)
+            series["time"].append(day.isoformat())
+            series["weathercode"].append(FORECAST_CODES[d % len(FORECAST_CODES)])
+            series["temperature_2m_max"].append(round(base + 4 + d % 3, 1))
+            series["temperature_2m_min"].append(round(base - 4 - d % 2, 1))
+        return series
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Заглушка API НБ РБ и Open-Meteo")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--hang", type=float, default=10.0)
+    parser.add_argument("--no-validators", action="store_true",
+                        help="не отдавать ETag и не отвечать 304")
+    args = parser.parse_args()
+
+    faults = Faults(args.latency, args.jitter, args.error_rate, args.timeout_rate, args.hang)
+    server = StubServer(args.host, args.port, faults, validators=not args.no_validators)
+    print("Заглушка слушает", server.base_url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
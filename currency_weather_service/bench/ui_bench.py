@@ -0,0 +1,130 @@
+"""
+Замер перерисовок и памяти главного окна на длинной серии обновлений
+без сети и без экрана (Qt offscreen): снимки подаются в окно напрямую,
+хаб не запускается.
+
+    python bench/ui_bench.py                    # 2000 итераций на фазу
+    python bench/ui_bench.py --iterations 10000
+
+Для каждой фазы печатаются перерисовки на итерацию, время итерации,
+число живых виджетов и RSS на контрольных точках — при отсутствии
+утечек последние два не растут.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtCore import QEvent, QObject  # noqa: E402
+from PyQt6.QtWidgets import QApplication, QLabel  # noqa: E402
+
+CHECKPOINTS = 5
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class PaintCounter(QObject):
+    def __init__(self):
+        super().__init__()
+        self.paints = 0
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Paint:
+            self.paints += 1
+        return False
+
+
+def make_snapshot(i, cities, changing):
+    """
+    Снимок как из хаба: новые объекты на каждом цикле. В фазе changing
+    температура и курсы меняются каждую итерацию, иначе значения те же.
+    """
+    step = i if changing else 0
+    now = time.time()
+    return {
+        "cities": cities,
+        "weather": {city: {"temp": 5.0 + step % 7, "wind": 3.0, "code": 3} for city in cities},
+        "weather_updated": now,
+        "forecast": None,
+        "rates": {"USD": 2.95 + step % 5 / 1000, "EUR": 3.45, "RUB": 0.0368},
+        "table": None,
+        "table_prev": None,
+        "rates_date": "2026-01-01",
+        "rates_updated": now,
+        "updated": now,
+        "error": None,
+        "stale": False,
+    }
+
+
+def run_phase(app, counter, name, iterations, step):
+    app.processEvents()
+    counter.paints = 0
+    started = time.perf_counter()
+    points = []
+    every = max(iterations // CHECKPOINTS, 1)
+    for i in range(iterations):
+        step(i)
+        app.processEvents()
+        if (i + 1) % every == 0:
+            points.append((len(QApplication.allWidgets()), rss_mb()))
+    elapsed = time.perf_counter() - started
+
+    print(f"  {name:13} перерисовок/итер={counter.paints / iterations:6.2f}  "
+          f"итерация={elapsed / iterations * 1000:7.3f} мс")
+    print("  " + " " * 13 + " виджетов: " + " ".join(f"{w:5}" for w, _ in points))
+    print("  " + " " * 13 + " RSS, МБ:  " + " ".join(f"{m:5.1f}" for _, m in points))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Перерисовки и память главного окна")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    # настройки и кэши пишутся в текущий каталог — уводим их во временный
+    os.chdir(tempfile.mkdtemp(prefix="cws-ui-bench-"))
+
+    from app import hub as hub_module
+    from app.hub import DataHub
+
+    hub = DataHub(["Минск", "Брест"])
+    hub.start = lambda: None
+    hub_module._hub = hub
+
+    from app.ui_window import MainWindow
+
+    app = QApplication(sys.argv)
+    window = MainWindow()
+    window.show()
+
+    counter = PaintCounter()
+    for label in window.findChildren(QLabel):
+        label.installEventFilter(counter)
+
+    cities = window.cities
+    phases = {
+        "без изменений": lambda i: window.on_snapshot(make_snapshot(i, cities, changing=False)),
+        "с изменениями": lambda i: window.on_snapshot(make_snapshot(i, cities, changing=True)),
+        "уведомления": lambda i: window.show_notification(f"Уведомление {i % 3}"),
+        "смена темы": lambda i: window.switch_theme(),
+    }
+
+    print(f"итераций на фазу: {args.iterations}")
+    for name, step in phases.items():
+        run_phase(app, counter, name, args.iterations, step)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,119 @@
-from app.ui_window import run_window
-
-if __name__ == "__main__":
-    run_window()
+import argparse
+import sys
+from contextlib import nullcontext
+
+# тяжёлые модули (PyQt6, pystray, Pillow, plyer) импортируются
+# только внутри выбранного режима
+
+
+def start_services(profiler):
+    # логи и экспорт метрик общие для всех режимов
+    with profiler.phase("import app.log, app.metrics, app.settings"):
+        from app.log import setup_logging
+        from app.metrics import start_exporters
+        from app.settings import load_settings
+    with profiler.phase("логи + экспорт метрик"):
+        setup_logging()
+        start_exporters(load_settings())
+
+
+def start_gui(profiler):
+    with profiler.phase("import app.ui_window"):
+        from app.ui_window import create_window
+    with profiler.phase("QApplication + MainWindow"):
+        app, _window = create_window()
+    return lambda: sys.exit(app.exec())
+
+
+def start_tray(profiler):
+    with profiler.phase("import app.tray"):
+        from app.tray import create_tray
+    with profiler.phase("иконка в трее + фоновый поток"):
+        icon, _worker = create_tray()
+    return icon.run
+
+
+def start_headless(profiler):
+    with profiler.phase("import app.headless"):
+        from app.headless import create_headless, serve
+    with profiler.phase("фоновый поток"):
+        worker = create_headless()
+    return lambda: serve(worker)
+
+
+def start_daemon(profiler, socket_path=None):
+    with profiler.phase("import app.daemon"):
+        import asyncio
+        from app.daemon import create_daemon
+    with profiler.phase("демон"):
+        daemon = create_daemon(socket_path)
+
+    def run():
+        try:
+            asyncio.run(daemon.serve())
+        except KeyboardInterrupt:
+            pass
+
+    return run
+
+
+MODES = {
+    "gui": start_gui,
+    "tray": start_tray,
+    "headless": start_headless,
+    "daemon": start_daemon
+}
+
+
+class _NoProfiler:
+    def phase(self, name):
+        return nullcontext()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Курсы валют и погода")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--gui", dest="mode", action="store_const", const="gui",
+                      help="окно PyQt (по умолчанию)")
+    mode.add_argument("--tray", dest="mode", action="store_const", const="tray",
+                      help="только иконка в системном трее")
+    mode.add_argument("--headless", dest="mode", action="store_const", const="headless",
+                      help="без GUI: фоновое обновление, вывод в консоль")
+    mode.add_argument("--daemon", dest="mode", action="store_const", const="daemon",
+                      help="локальный HTTP/JSON-сервер со снимком данных")
+    parser.add_argument("--socket", metavar="PATH",
+                        help="для --daemon: дополнительно слушать unix-сокет")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="показать, на что уходит время запуска, и выйти")
+    parser.set_defaults(mode="gui")
+    return parser.parse_args(argv)
+
+
+def mode_options(args):
+    if args.mode == "daemon":
+        return {"socket_path": args.socket}
+    return {}
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if not args.profile_startup:
+        start_services(_NoProfiler())
+        MODES[args.mode](_NoProfiler(), **mode_options(args))()
+        return
+
+    from app.startup_profile import StartupProfiler
+
+    profiler = StartupProfiler()
+    profiler.install()
+    try:
+        start_services(profiler)
+        MODES[args.mode](profiler, **mode_options(args))
+    finally:
+        profiler.uninstall()
+    print(profiler.report())
+
+
+if __name__ == "__main__":
+    main()
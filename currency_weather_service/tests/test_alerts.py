@@ -0,0 +1,78 @@
+from app.alerts import AlertEngine, AlertRule
+
+HOUR = 3600
+
+
+def engine(pct=0.5, hysteresis=0.5, cooldown=HOUR):
+    return AlertEngine(AlertRule(pct=pct, hysteresis=hysteresis, cooldown=cooldown))
+
+
+def run(engine, series, step=60):
+    """Курсы USD по циклам; возвращает [(номер цикла, Alert)]."""
+    fired = []
+    for i, rate in enumerate(series):
+        fired += [(i, alert) for alert in engine.evaluate({"USD": rate}, i * step)]
+    return fired
+
+
+def test_fires_when_threshold_reached():
+    fired = run(engine(), [3.00, 3.02])
+    assert [i for i, _ in fired] == [1]
+    assert (fired[0][1].old, fired[0][1].new) == (3.00, 3.02)
+
+
+def test_first_rates_only_set_reference():
+    assert run(engine(), [3.00]) == []
+
+
+def test_slow_drift_accumulates_to_threshold():
+    # по 0.2% за цикл — меньше порога, но от опорного курса набирается 0.6%
+    fired = run(engine(), [3.000, 3.006, 3.012, 3.018])
+    assert [i for i, _ in fired] == [3]
+    assert fired[0][1].old == 3.000
+
+
+def test_hysteresis_suppresses_continued_move():
+    fired = run(engine(cooldown=0), [3.00, 3.02, 3.02, 3.04])
+    # cooldown 0: правило взводится на следующем цикле от 3.02 и молчит до нового порога
+    assert [i for i, _ in fired] == [1, 3]
+
+    fired = run(engine(), [3.00, 3.02, 3.02, 3.04])
+    assert [i for i, _ in fired] == [1]
+
+
+def test_jitter_around_threshold_does_not_refire():
+    fired = run(engine(), [3.00, 3.016, 3.014, 3.016, 3.014, 3.016])
+    assert [i for i, _ in fired] == [1]
+
+
+def test_rearms_when_move_recedes():
+    # 3.02 → 3.005: изменение от 3.00 упало ниже половины порога — взвод от 3.005
+    fired = run(engine(cooldown=0), [3.00, 3.02, 3.005, 3.025])
+    assert [i for i, _ in fired] == [1, 3]
+    assert fired[1][1].old == 3.005
+
+
+def test_cooldown_delays_repeat_alert():
+    e = engine(cooldown=HOUR)
+    fired = run(e, [3.00, 3.02, 3.005, 3.025])
+    # взведено на 3.005, но уведомление по USD было меньше часа назад
+    assert [i for i, _ in fired] == [1]
+    assert e.evaluate({"USD": 3.025}, HOUR + 60)[0].old == 3.005
+
+
+def test_cooldown_rearms_after_step_change():
+    e = engine(cooldown=HOUR)
+    run(e, [3.00, 3.02])
+    # курс остался на новом уровне: после cooldown опорным становится 3.02
+    assert e.evaluate({"USD": 3.02}, HOUR + 60) == []
+    assert e.evaluate({"USD": 3.03}, HOUR + 120) == []
+    alerts = e.evaluate({"USD": 3.04}, HOUR + 180)
+    assert (alerts[0].old, alerts[0].new) == (3.02, 3.04)
+
+
+def test_rules_per_currency():
+    e = AlertEngine(AlertRule(pct=0.5), {"RUB": AlertRule(pct=2.0)})
+    e.evaluate({"USD": 3.00, "RUB": 0.0350}, 0)
+    alerts = e.evaluate({"USD": 3.02, "RUB": 0.0353}, 60)
+    assert [a.code for a in alerts] == ["USD"]